@@ -0,0 +1,143 @@
+"""
+Content-hash fingerprinting of the CSS and JS files the pages load.
+
+Each asset matching ASSET_PATTERNS gets a copy named after its content
+hash next to it (src/css/main.css -> src/css/main.<hash>.css), recorded in
+asset-manifest.json at the site root. rewrite_asset_refs() points the
+<link href> and <script src> references of a page at the fingerprinted
+names, so they can be served with long-lived immutable caching; pages
+that already reference an older fingerprint are updated the same way.
+The unhashed files stay the ones to edit.
+"""
+import hashlib
+import json
+import os
+import re
+from urllib.parse import urljoin, urlsplit
+
+from site_pages import match_path, write_atomic
+
+MANIFEST_NAME = 'asset-manifest.json'
+
+# Assets to fingerprint, as globs relative to the site root
+ASSET_PATTERNS = (
+    'src/css/*.css',
+    'src/js/*.js',
+    'src/vendor/bootstrap/css/bootstrap.min.css',
+    'src/vendor/bootstrap/css/bootstrap.purged.min.css',
+    'src/vendor/bootstrap/js/bootstrap.bundle.min.js',
+    'src/vendor/jquery/jquery.min.js',
+)
+
+# Number of hex digits of the sha256 used in file names
+HASH_LENGTH = 10
+
+# A fingerprint just before the extension: main.0123456789.css
+FINGERPRINT_PATTERN = re.compile(rf'\.[0-9a-f]{{{HASH_LENGTH}}}(?=\.(?:css|js)$)')
+
+# href of a <link> or src of a <script>
+ASSET_REF_PATTERN = re.compile(
+    r'(<(?:link|script)\b[^>]*?\s(?:href|src)\s*=\s*)(["\'])([^"\']*)\2',
+    re.IGNORECASE,
+)
+
+
+def strip_fingerprint(path):
+    """Return a path or URL with any content-hash fingerprint removed."""
+    return FINGERPRINT_PATTERN.sub('', path)
+
+
+def fingerprinted_name(rel_path, content):
+    stem, ext = os.path.splitext(rel_path)
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    return f'{stem}.{digest}{ext}'
+
+
+def find_assets(base_dir):
+    """Return the relative paths of the assets to fingerprint."""
+    assets = []
+    roots = sorted({pattern.rsplit('/', 1)[0] for pattern in ASSET_PATTERNS})
+    for root in roots:
+        directory = os.path.join(base_dir, *root.split('/'))
+        if not os.path.isdir(directory):
+            continue
+        for name in sorted(os.listdir(directory)):
+            rel_path = f'{root}/{name}'
+            if strip_fingerprint(rel_path) != rel_path:
+                continue
+            if any(match_path(rel_path, pattern) for pattern in ASSET_PATTERNS):
+                assets.append(rel_path)
+    return assets
+
+
+def load_manifest(base_dir):
+    try:
+        with open(os.path.join(base_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def build_assets(base_dir, dry_run=False):
+    """Write the fingerprinted copies and the manifest; return the manifest.
+
+    The manifest maps each asset's path to its fingerprinted path. Copies
+    of earlier versions of an asset are removed once replaced. With
+    dry_run the manifest is only computed.
+    """
+    previous = load_manifest(base_dir)
+    manifest = {}
+    for rel_path in find_assets(base_dir):
+        path = os.path.join(base_dir, *rel_path.split('/'))
+        with open(path, 'rb') as f:
+            content = f.read()
+        hashed = fingerprinted_name(rel_path, content)
+        hashed_path = os.path.join(base_dir, *hashed.split('/'))
+        if not dry_run and not os.path.exists(hashed_path):
+            with open(hashed_path, 'wb') as f:
+                f.write(content)
+            print(f"🔖 Fingerprinted {rel_path} -> {os.path.basename(hashed)}")
+        manifest[rel_path] = hashed
+    if dry_run:
+        return manifest
+
+    for rel_path, hashed in previous.items():
+        if manifest.get(rel_path) != hashed:
+            stale = os.path.join(base_dir, *hashed.split('/'))
+            if os.path.exists(stale):
+                os.unlink(stale)
+
+    write_atomic(
+        os.path.join(base_dir, MANIFEST_NAME),
+        json.dumps(manifest, indent=2, sort_keys=True) + '\n',
+    )
+    return manifest
+
+
+def manifest_hash(manifest):
+    """Hash of an asset manifest; changes whenever any asset does."""
+    return hashlib.sha256(json.dumps(manifest, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def rewrite_asset_refs(content, page_dir, manifest):
+    """Point a page's <link>/<script> references at the fingerprinted assets.
+
+    page_dir is the page's directory relative to the site root; references
+    keep their relative or absolute form, query and fragment.
+    """
+
+    def replace(match):
+        url = match.group(3)
+        parts = urlsplit(url)
+        if parts.scheme or url.startswith('//') or not parts.path:
+            return match.group(0)
+        base = f'/{page_dir}/' if page_dir else '/'
+        rel_path = strip_fingerprint(urlsplit(urljoin(base, parts.path)).path.lstrip('/'))
+        hashed = manifest.get(rel_path)
+        if not hashed:
+            return match.group(0)
+        directory = parts.path.rsplit('/', 1)[0] + '/' if '/' in parts.path else ''
+        new_url = directory + os.path.basename(hashed) + url[len(parts.path):]
+        return f'{match.group(1)}{match.group(2)}{new_url}{match.group(2)}'
+
+    return ASSET_REF_PATTERN.sub(replace, content)
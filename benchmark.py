@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Benchmark the page-rewriting scripts on synthetic sites.
+
+A synthetic site is generated from the real product_pages/ and
+recipe_details/ pages (plus contact.html as the template source), with a
+share of pages that have a stale, unterminated or missing header. For each
+site size the script times full runs of replace_header_footer.py and
+replace_headers.py in a subprocess, records their peak RSS, and measures
+per-file latency percentiles in-process. Results are saved as JSON so runs
+from different releases can be compared.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import replace_header_footer
+import replace_headers
+from site_pages import BASE_DIR, DEFAULT_CONFIG, discover_pages, load_config
+from template_registry import load_partials
+
+# Directories the synthetic pages are spread over, as on the real site
+SEED_DIRS = ('product_pages', 'recipe_details')
+
+PERCENTILES = (50, 90, 99)
+
+
+def load_seeds():
+    """Return the contents of the real detail pages used as page models."""
+    seeds = []
+    for directory in SEED_DIRS:
+        path = os.path.join(BASE_DIR, directory)
+        for name in sorted(os.listdir(path)):
+            if name.endswith('.html'):
+                with open(os.path.join(path, name), 'r', encoding='utf-8') as f:
+                    seeds.append((directory, name[:-len('.html')], f.read()))
+    return seeds
+
+
+def damage(content, kind):
+    """Return a page with its header made stale, unterminated or missing."""
+    start = content.find('<header')
+    end = content.find('</header>', start)
+    if start == -1 or end == -1:
+        return content
+    end += len('</header>')
+    if kind == 'stale':
+        header = content[start:end].replace('multilingual-text', 'multilingual-text old', 1)
+        return content[:start] + header + content[end:]
+    if kind == 'unterminated':
+        return content[:end - len('</header>')] + content[end:]
+    # missing
+    return content[:start] + content[end:]
+
+
+def generate_site(target, page_count, seeds, malformed, seed=0):
+    """Write a synthetic site with page_count pages to target.
+
+    About a third of the pages get a stale header so there is real work to
+    do; `malformed` is the share with an unterminated or missing header.
+    """
+    rng = random.Random(seed)
+    os.makedirs(target, exist_ok=True)
+    shutil.copy(os.path.join(BASE_DIR, 'contact.html'), target)
+    with open(os.path.join(target, 'site_config.json'), 'w', encoding='utf-8') as f:
+        json.dump(DEFAULT_CONFIG, f, indent=2)
+    for directory in SEED_DIRS:
+        os.makedirs(os.path.join(target, directory), exist_ok=True)
+
+    for i in range(page_count):
+        directory, stem, content = seeds[i % len(seeds)]
+        roll = rng.random()
+        if roll < malformed:
+            content = damage(content, rng.choice(('unterminated', 'missing')))
+        elif roll < malformed + 0.33:
+            content = damage(content, 'stale')
+        path = os.path.join(target, directory, f'{stem}_{i:05d}.html')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+
+def percentiles(samples):
+    """Return p50/p90/p99/max (milliseconds) of a list of durations in seconds."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    result = {}
+    for p in PERCENTILES:
+        index = min(len(ordered) - 1, round(p / 100 * (len(ordered) - 1)))
+        result[f'p{p}_ms'] = ordered[index] * 1000
+    result['max_ms'] = ordered[-1] * 1000
+    return result
+
+
+def max_rss_mb(rusage):
+    """Peak RSS from a rusage struct, in MB (ru_maxrss is KB on Linux, bytes on macOS)."""
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return rusage.ru_maxrss / divisor
+
+
+def read_hwm_mb(pid):
+    """Peak RSS of a running process from /proc, in MB, or None if unavailable."""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        with open(f'/proc/{pid}/status', 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def run_script(script, site_dir, *extra_args):
+    """Run one of the scripts on a site; return wall time and peak RSS.
+
+    On Linux a child's ru_maxrss also counts the memory of the benchmark
+    process it was forked from, so the child's own high-water mark is
+    sampled from /proc while it runs; elsewhere rusage is used. Without
+    os.wait4 (Windows) the peak is the largest of all children so far from
+    RUSAGE_CHILDREN, or None where the resource module is missing too.
+    """
+    command = [
+        sys.executable, os.path.join(BASE_DIR, script),
+        '--config', os.path.join(site_dir, 'site_config.json'), *extra_args,
+    ]
+    started = time.perf_counter()
+    if not hasattr(os, 'wait4'):
+        process = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - started
+        return {
+            'seconds': elapsed,
+            'peak_rss_mb': (max_rss_mb(resource.getrusage(resource.RUSAGE_CHILDREN))
+                            if resource is not None else None),
+            'exit_code': process.returncode,
+        }
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    peak_mb = None
+    while True:
+        pid, status, rusage = os.wait4(process.pid, os.WNOHANG)
+        if pid:
+            break
+        peak_mb = read_hwm_mb(process.pid) or peak_mb
+        time.sleep(0.005)
+    elapsed = time.perf_counter() - started
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return {
+        'seconds': elapsed,
+        'peak_rss_mb': peak_mb if peak_mb is not None else max_rss_mb(rusage),
+        'exit_code': process.returncode,
+    }
+
+
+def time_per_file(site_dir, tool):
+    """Time each page of a site in-process with one of the tools."""
+    config = load_config(os.path.join(site_dir, 'site_config.json'))
+    pages = discover_pages(config, warn=False)
+    samples = []
+    if tool == 'replace_header_footer':
+        templates = load_partials(config['template_source'])
+        for page in pages:
+            started = time.perf_counter()
+            replace_header_footer.process_page(page.path, templates)
+            samples.append(time.perf_counter() - started)
+    else:
+        for page in pages:
+            started = time.perf_counter()
+            replace_headers.process_file(page.path, config['template_source'])
+            samples.append(time.perf_counter() - started)
+    return percentiles(samples)
+
+
+def benchmark_size(work_dir, page_count, seeds, malformed, jobs):
+    """Run every scenario on a fresh copy of a synthetic site."""
+    pristine = os.path.join(work_dir, f'site-{page_count}')
+    print(f"Generating {page_count} pages...")
+    generate_site(pristine, page_count, seeds, malformed)
+
+    def fresh_copy(name):
+        path = os.path.join(work_dir, f'{name}-{page_count}')
+        shutil.rmtree(path, ignore_errors=True)
+        shutil.copytree(pristine, path)
+        return path
+
+    results = {'pages': page_count}
+
+    site = fresh_copy('header-footer')
+    print("  replace_header_footer.py (cold, then incremental)...")
+    results['replace_header_footer_cold'] = run_script('replace_header_footer.py', site)
+    results['replace_header_footer_incremental'] = run_script('replace_header_footer.py', site)
+
+    print(f"  replace_headers.py (1 job, then {jobs} jobs)...")
+    results['replace_headers_serial'] = run_script(
+        'replace_headers.py', fresh_copy('headers-serial'), '--jobs', '1'
+    )
+    results['replace_headers_parallel'] = run_script(
+        'replace_headers.py', fresh_copy('headers-parallel'), '--jobs', str(jobs)
+    )
+
+    print("  per-file latency...")
+    results['replace_header_footer_per_file'] = time_per_file(
+        fresh_copy('per-file-hf'), 'replace_header_footer'
+    )
+    results['replace_headers_per_file'] = time_per_file(
+        fresh_copy('per-file-h'), 'replace_headers'
+    )
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_summary(results):
+    for size in results['sizes']:
+        print(f"\n{size['pages']} pages:")
+        for name, value in size.items():
+            if name == 'pages':
+                continue
+            if 'seconds' in value:
+                peak = value['peak_rss_mb']
+                memory = f"{peak:7.1f} MB" if peak is not None else '      - MB'
+                print(f"  {name:<36} {value['seconds']:8.2f} s  "
+                      f"{memory}  (exit {value['exit_code']})")
+            else:
+                stats = '  '.join(f"{key[:-3]} {ms:.2f}" for key, ms in value.items())
+                print(f"  {name:<36} {stats}  (ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--pages',
+        type=int,
+        nargs='+',
+        default=[1000],
+        help='site sizes to benchmark (default: 1000)',
+    )
+    parser.add_argument(
+        '--malformed',
+        type=float,
+        default=0.02,
+        help='share of pages with an unterminated or missing header (default: 0.02)',
+    )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=os.cpu_count() or 1,
+        help='worker count for the parallel replace_headers.py run',
+    )
+    parser.add_argument(
+        '--output',
+        help='JSON results file (default: benchmarks/results-<timestamp>.json)',
+    )
+    parser.add_argument(
+        '--keep',
+        action='store_true',
+        help='keep the generated sites instead of deleting them',
+    )
+    args = parser.parse_args()
+
+    seeds = load_seeds()
+    work_dir = tempfile.mkdtemp(prefix='kulinarium-bench-')
+    started = datetime.now(timezone.utc)
+    results = {
+        'started': started.isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'malformed': args.malformed,
+        'sizes': [],
+    }
+    try:
+        for page_count in args.pages:
+            results['sizes'].append(
+                benchmark_size(work_dir, page_count, seeds, args.malformed, args.jobs)
+            )
+    finally:
+        if args.keep:
+            print(f"\nSynthetic sites kept in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    output = args.output or os.path.join(
+        BASE_DIR, 'benchmarks', f"results-{started.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+    print_summary(results)
+    print(f"\nResults saved to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Extract the recipe and product pages into a structured catalog.
+
+For every page of recipe_details/ and product_pages/ the title (as the
+".."-separated multilingual text of its <h1>), the category of a recipe
+and its image are written to catalog.json:
+
+    {"pages": {"recipe_details/x.html": {"url": ..., "type": "recipe",
+               "title": ..., "category": ..., "image": ...,
+               "mtime_ns": ..., "size": ...}, ...}}
+
+A page is only parsed again when its mtime or size changed, so adding or
+editing a page re-extracts just that page; the changed pages are parsed
+in parallel with --jobs. render_listings.py renders the listing grids
+from the catalog.
+"""
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from build_search_index import DOCUMENT_TYPES, extract_fields
+from site_pages import discover_pages, load_config, match_path, write_atomic
+from split_languages import page_url
+
+CATALOG_NAME = 'catalog.json'
+
+
+def load_catalog(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            catalog = json.load(f)
+    except (OSError, ValueError):
+        return {'pages': {}}
+    return catalog if isinstance(catalog.get('pages'), dict) else {'pages': {}}
+
+
+def page_data(entry):
+    """An entry without the mtime and size it was extracted at."""
+    return {key: value for key, value in entry.items() if key not in ('mtime_ns', 'size')}
+
+
+def extract_entry(page, doc_type):
+    """Return (rel path, catalog entry or None, message)."""
+    try:
+        with open(page.path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        url = page_url(page.rel_path)
+        fields, image = extract_fields(content, url)
+    except Exception as e:
+        return page.rel_path, None, f"❌ Error reading {page.rel_path}: {e}"
+    if not fields['title']:
+        return page.rel_path, None, f"⚠️  No title in {page.rel_path}, skipped"
+    entry = {
+        'url': url,
+        'type': doc_type,
+        'title': fields['title'][0],
+        'category': fields['category'][0] if fields['category'] else None,
+        'image': image,
+        'mtime_ns': page.mtime_ns,
+        'size': page.size,
+    }
+    return page.rel_path, entry, f"✅ Extracted {page.rel_path}"
+
+
+def update_catalog(config, jobs=1, force=False):
+    """Bring catalog.json up to date with the pages.
+
+    Returns (catalog, rel paths of the entries added, changed or removed).
+    """
+    path = os.path.join(config['base_dir'], CATALOG_NAME)
+    catalog = load_catalog(path)
+    previous = {} if force else catalog['pages']
+
+    pages = {}
+    stale = []
+    for page in discover_pages(config):
+        doc_type = next(
+            (t for pattern, t in DOCUMENT_TYPES.items() if match_path(page.rel_path, pattern)),
+            None,
+        )
+        if not doc_type:
+            continue
+        entry = previous.get(page.rel_path)
+        if entry and (entry.get('mtime_ns'), entry.get('size')) == (page.mtime_ns, page.size):
+            pages[page.rel_path] = entry
+        else:
+            stale.append((page, doc_type))
+
+    if jobs > 1 and len(stale) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(extract_entry, *zip(*stale)))
+    else:
+        results = [extract_entry(page, doc_type) for page, doc_type in stale]
+
+    changed = set()
+    for rel_path, entry, message in results:
+        print(message)
+        if entry is None:
+            continue
+        pages[rel_path] = entry
+        if rel_path not in previous or page_data(previous[rel_path]) != page_data(entry):
+            changed.add(rel_path)
+    changed.update(set(previous) - set(pages))
+
+    new_catalog = {'pages': dict(sorted(pages.items()))}
+    if new_catalog != catalog:
+        write_atomic(path, json.dumps(new_catalog, ensure_ascii=False, indent=2) + '\n')
+    return new_catalog, changed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        '--config',
+        help='site config listing the pages (default: site_config.json)',
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=1,
+        help='number of worker processes (0 = one per CPU core, default: 1)',
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='parse every page, ignoring the recorded mtimes and sizes',
+    )
+    args = parser.parse_args()
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+
+    config = load_config(args.config)
+    catalog, changed = update_catalog(config, jobs, args.force)
+    print(f"\n✅ {len(catalog['pages'])} pages in {CATALOG_NAME} ({len(changed)} changed)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Build a static, sharded search index of the recipe and product pages.
+
+Titles, categories and ingredients are extracted from recipe_details/ and
+product_pages/ in each of the four languages and written under search/:
+
+- search/docs.json: one entry per page (url, type, image and the title
+  and category per language); a document's id is its position here.
+- search/<lang>/<shard>.json: {term: [[doc id, weight], ...]} for the
+  terms of that language whose shard is <shard>.
+- search/manifest.json: languages, shard count and the shard function.
+
+A term's shard is FNV-1a (32 bit, over UTF-16 code units) of its first
+PREFIX_LENGTH characters modulo SHARD_COUNT, so the browser only fetches
+the shard a typed word (or prefix) lives in. Text that isn't
+multilingual is indexed in every language, as that is how it is shown.
+"""
+import argparse
+import json
+import os
+import re
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+from site_pages import discover_pages, load_config, match_path, write_atomic
+from split_languages import LANGUAGES, SEPARATOR, VOID_TAGS, page_url, split_text
+
+OUTPUT_DIR = 'search'
+
+# Pages indexed, and the document type recorded for them
+DOCUMENT_TYPES = {
+    'recipe_details/*.html': 'recipe',
+    'product_pages/*.html': 'product',
+}
+
+# Score of a term per field it occurs in
+FIELD_WEIGHTS = {'title': 3, 'category': 2, 'ingredients': 1}
+
+SHARD_COUNT = 32
+PREFIX_LENGTH = 2
+
+# Terms shorter than this aren't indexed
+MIN_TERM_LENGTH = 2
+
+TERM_PATTERN = re.compile(r'\w+')
+
+# Label introducing a product's ingredients, in the language of the page source
+INGREDIENTS_LABEL = 'Склад'
+
+
+def shard_of(term):
+    """FNV-1a of the term's prefix, as computed in the browser."""
+    h = 0x811c9dc5
+    prefix = term[:PREFIX_LENGTH].encode('utf-16-le')
+    for i in range(0, len(prefix), 2):
+        h ^= prefix[i] | (prefix[i + 1] << 8)
+        h = (h * 0x01000193) & 0xffffffff
+    return h % SHARD_COUNT
+
+
+def terms(text):
+    return [
+        term for term in TERM_PATTERN.findall(text.casefold())
+        if len(term) >= MIN_TERM_LENGTH and not term.isdigit()
+    ]
+
+
+class _FieldExtractor(HTMLParser):
+    """Collects the raw text of the title, category and ingredients of a page.
+
+    Recipes: the <h1>, the first <p> of section.recipe-detail--title and
+    the items of ul.recipe--ingredients-list. Products: the <h1> and the
+    span following the "Склад:" label.
+    """
+
+    def __init__(self, url):
+        super().__init__(convert_charrefs=True)
+        self.url = url
+        self.fields = {name: [] for name in FIELD_WEIGHTS}
+        self.image = None
+        self.first_image = None
+        self.link = None
+        self.stack = []
+        self.capture = None
+        self.buffer = []
+        self.in_main = False
+        self.after_label = False
+        self.label_text = None
+
+    def handle_starttag(self, tag, attrs):
+        attributes = dict(attrs)
+        classes = (attributes.get('class') or '').split()
+        self.stack.append((tag, classes))
+        if tag == 'main':
+            self.in_main = True
+        if not self.in_main or self.capture:
+            if tag in VOID_TAGS:
+                self.stack.pop()
+            return
+        if tag == 'a':
+            self.link = urljoin(self.url, attributes.get('href') or '')
+        elif tag == 'img' and self.image is None and attributes.get('src'):
+            src = urljoin(self.url, attributes['src'])
+            self.first_image = self.first_image or src
+            # The product photo, or the recipe's own card among the related ones
+            if 'product-image--zoom' in classes or self.link == self.url:
+                self.image = src
+        parent_classes = [c for _, cls in self.stack[:-1] for c in cls]
+        field = None
+        if tag == 'h1' and not self.fields['title']:
+            field = 'title'
+        elif (tag == 'p' and 'recipe-detail--title' in parent_classes
+              and not self.fields['category']):
+            field = 'category'
+        elif tag == 'li' and 'recipe--ingredients-list' in parent_classes:
+            field = 'ingredients'
+        elif tag == 'span' and self.after_label:
+            field = 'ingredients'
+        elif tag == 'strong':
+            self.label_text = []
+        if field:
+            self.capture = (field, len(self.stack))
+            self.buffer = []
+        self.after_label = False
+        if tag in VOID_TAGS:
+            self.stack.pop()
+
+    def handle_endtag(self, tag):
+        if not self.stack:
+            return
+        # Pop up to the matching start tag, tolerating unclosed elements
+        for depth in range(len(self.stack) - 1, -1, -1):
+            if self.stack[depth][0] == tag:
+                break
+        else:
+            return
+        del self.stack[depth:]
+        if self.capture and len(self.stack) < self.capture[1]:
+            self.fields[self.capture[0]].append(' '.join(''.join(self.buffer).split()))
+            self.capture = None
+        if tag == 'strong' and self.label_text is not None:
+            self.after_label = ''.join(self.label_text).strip().startswith(INGREDIENTS_LABEL)
+            self.label_text = None
+        if tag == 'a':
+            self.link = None
+        if tag == 'main':
+            self.in_main = False
+
+    def handle_data(self, data):
+        if self.capture:
+            self.buffer.append(data)
+        elif self.label_text is not None:
+            self.label_text.append(data)
+
+
+def per_language(texts):
+    """Split field texts into {lang code: text} for each language."""
+    result = {}
+    for index, lang in enumerate(LANGUAGES):
+        parts = []
+        for text in texts:
+            translated = split_text(text, index) if SEPARATOR in text else None
+            parts.append(translated if translated is not None else text)
+        result[lang.code] = ' '.join(part for part in parts if part)
+    return result
+
+
+def extract_fields(content, url):
+    """Return ({field: [raw texts]}, image URL) of a recipe or product page."""
+    extractor = _FieldExtractor(url)
+    extractor.feed(content)
+    extractor.close()
+    return extractor.fields, extractor.image or extractor.first_image
+
+
+def extract_document(page, doc_type):
+    with open(page.path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    url = page_url(page.rel_path)
+    raw_fields, image = extract_fields(content, url)
+    fields = {name: per_language(texts) for name, texts in raw_fields.items()}
+    document = {
+        'url': url,
+        'type': doc_type,
+        'image': image,
+        'title': fields['title'],
+        'category': fields['category'],
+    }
+    return document, fields
+
+
+def build_index(documents):
+    """Return {lang: {shard: {term: [[doc id, weight], ...]}}}."""
+    index = {lang.code: {} for lang in LANGUAGES}
+    for doc_id, fields in enumerate(documents):
+        for lang in LANGUAGES:
+            weights = {}
+            for name, weight in FIELD_WEIGHTS.items():
+                for term in set(terms(fields[name][lang.code])):
+                    weights[term] = weights.get(term, 0) + weight
+            for term, weight in weights.items():
+                shard = index[lang.code].setdefault(shard_of(term), {})
+                shard.setdefault(term, []).append([doc_id, weight])
+    return index
+
+
+def write_json(path, data):
+    """Write compact JSON if it differs from the file; return whether it was written."""
+    content = json.dumps(data, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                return False
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_atomic(path, content)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        '--config',
+        help='site config listing the pages to index (default: site_config.json)',
+    )
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    output_dir = os.path.join(config['base_dir'], OUTPUT_DIR)
+
+    docs = []
+    documents = []
+    for page in discover_pages(config):
+        doc_type = next(
+            (t for pattern, t in DOCUMENT_TYPES.items() if match_path(page.rel_path, pattern)),
+            None,
+        )
+        if not doc_type:
+            continue
+        try:
+            document, fields = extract_document(page, doc_type)
+        except Exception as e:
+            print(f"❌ Error indexing {page.rel_path}: {e}")
+            continue
+        if not any(fields['title'].values()):
+            print(f"⚠️  No title in {page.rel_path}, skipped")
+            continue
+        docs.append(document)
+        documents.append(fields)
+
+    index = build_index(documents)
+
+    written = set()
+    outputs = {
+        os.path.join(output_dir, 'docs.json'): docs,
+        os.path.join(output_dir, 'manifest.json'): {
+            'languages': [lang.code for lang in LANGUAGES],
+            'shards': SHARD_COUNT,
+            'prefix_length': PREFIX_LENGTH,
+            'shard_function': 'fnv1a32(utf16(term[:prefix_length])) % shards',
+        },
+    }
+    for lang, shards in index.items():
+        for shard, postings in shards.items():
+            outputs[os.path.join(output_dir, lang, f'{shard}.json')] = postings
+
+    updated = 0
+    for path, data in outputs.items():
+        written.add(path)
+        updated += write_json(path, data)
+
+    # Shards that no longer have any terms
+    for root, _, names in os.walk(output_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            if name.endswith('.json') and path not in written:
+                os.unlink(path)
+
+    term_count = sum(len(postings) for shards in index.values() for postings in shards.values())
+    print(f"✅ Indexed {len(docs)} pages: {term_count} terms in "
+          f"{len(outputs) - 2} shards ({updated} files updated)")
+
+
+if __name__ == '__main__':
+    main()
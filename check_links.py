@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Check the internal links and asset references of every page.
+
+Each discovered page is parsed once and every href/src/srcset/poster that
+points into the site is resolved against an in-memory index of the files
+under the site root, in a process pool. Reported are:
+
+- broken references (no such file),
+- relative references that climb above the site root (browsers clamp
+  them, so they only work while the site is served from the domain root),
+- pages mixing relative and root-absolute references,
+- orphan pages that no other page links to.
+
+Exits with status 1 if any reference is broken.
+"""
+import argparse
+import bisect
+import html
+import os
+import posixpath
+import re
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import unquote, urlsplit
+
+from site_pages import Page, discover_pages, load_config
+
+# Attributes holding a single URL, and those holding a srcset list
+URL_ATTRIBUTES = ('href', 'src', 'poster', 'data-src')
+SRCSET_ATTRIBUTES = ('srcset', 'data-srcset')
+
+# A URL attribute, matched case-sensitively: that is several times faster
+# and the pages use lowercase markup
+ATTRIBUTE_PATTERN = re.compile(
+    rf'({"|".join(URL_ATTRIBUTES + SRCSET_ATTRIBUTES)})\s*=\s*'
+    r'(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+))'
+)
+
+# Comments and script/style elements, whose contents are skipped
+SKIPPED_PATTERN = re.compile(
+    r'<!--.*?-->|<(script|style)\b[^>]*>(.*?)</\1\s*>', re.DOTALL | re.IGNORECASE
+)
+
+TAG_NAME_PATTERN = re.compile(r'<([a-zA-Z][\w-]*)')
+
+# Directories never served
+SKIPPED_DIRS = ('node_modules',)
+
+# Served for a URL ending in '/'
+DIRECTORY_INDEX = 'index.html'
+
+# A reference from a page: target path (relative to the site root), the
+# URL as written, its offset in the page, whether it is an <a> link and
+# whether it climbs above the site root
+Reference = namedtuple('Reference', 'target url offset is_link escapes')
+
+# Index of the site's files, set in each worker by _init_worker
+_files = frozenset()
+
+
+def build_file_index(base_dir):
+    """Return the relative paths of all files under the site root."""
+    files = set()
+    for root, dirs, names in os.walk(base_dir):
+        dirs[:] = [d for d in dirs if not d.startswith('.') and d not in SKIPPED_DIRS]
+        rel_root = os.path.relpath(root, base_dir).replace(os.sep, '/')
+        prefix = '' if rel_root == '.' else f'{rel_root}/'
+        files.update(prefix + name for name in names if not name.startswith('.'))
+    return frozenset(files)
+
+
+def resolve(url, page_dir):
+    """Resolve a URL from a page to (site-relative path, escapes), or None.
+
+    Returns None for external URLs, fragments and non-file schemes.
+    escapes is True for a relative path that climbs above the site root.
+    """
+    url = url.strip()
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+    path = unquote(parts.path)
+    if path.startswith('/'):
+        target, escapes = posixpath.normpath(path).lstrip('/'), False
+    else:
+        segments = posixpath.normpath(posixpath.join(page_dir, path)).split('/')
+        escapes = segments[0] == '..'
+        # Like a browser, stop at the root
+        while segments and segments[0] == '..':
+            segments.pop(0)
+        target = '/'.join(segments)
+    if target == '.':
+        target = ''
+    if path.endswith('/') or not target:
+        target = posixpath.join(target, DIRECTORY_INDEX)
+    return target, escapes
+
+
+def collect_references(content, page_dir):
+    """Return the References of a page.
+
+    The URL attributes are found with one regex scan rather than an
+    HTMLParser pass, which is several times slower; matches inside
+    comments and script/style bodies are skipped.
+    """
+    skipped = []
+    for match in SKIPPED_PATTERN.finditer(content):
+        if match.group(1):
+            skipped.append(match.span(2))
+        else:
+            skipped.append(match.span())
+    skip_starts = [start for start, _ in skipped]
+
+    references = []
+    for attr in ATTRIBUTE_PATTERN.finditer(content):
+        position = attr.start()
+        # Part of a longer name such as data-href (checked here, as a
+        # lookbehind in the pattern would slow the scan down)
+        if position and (content[position - 1].isalnum() or content[position - 1] in '-_'):
+            continue
+        i = bisect.bisect_right(skip_starts, position) - 1
+        if i >= 0 and position < skipped[i][1]:
+            continue
+        # Must be inside a start tag, not in text
+        tag_start = content.rfind('<', 0, position)
+        if tag_start == -1 or content.find('>', tag_start, position) != -1:
+            continue
+        tag = TAG_NAME_PATTERN.match(content, tag_start)
+        if not tag:
+            continue
+        name = attr.group(1)
+        value = next(group for group in attr.groups()[1:] if group is not None)
+        if '&' in value:
+            value = html.unescape(value)
+        if name in SRCSET_ATTRIBUTES:
+            urls = [c.split()[0] for c in value.split(',') if c.strip()]
+        else:
+            urls = [value]
+        for url in urls:
+            resolved = resolve(url, page_dir)
+            if resolved:
+                references.append(Reference(
+                    resolved[0], url.strip(), position,
+                    tag.group(1).lower() == 'a' and name == 'href', resolved[1],
+                ))
+    return references
+
+
+def _init_worker(files):
+    global _files
+    _files = files
+
+
+def check_page(page):
+    """Parse one page and check its references against the file index.
+
+    Returns (rel_path, broken, escaping, style_counts, linked pages).
+    """
+    try:
+        with open(page.path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        return page.rel_path, [(0, f'unreadable: {e}')], [], {}, set()
+
+    newlines = []
+
+    def line(offset):
+        if not newlines:
+            newlines.extend(m.start() for m in re.finditer('\n', content))
+        return bisect.bisect_left(newlines, offset) + 1
+
+    broken = []
+    escaping = []
+    styles = {'relative': 0, 'absolute': 0}
+    linked = set()
+    for ref in collect_references(content, posixpath.dirname(page.rel_path)):
+        styles['absolute' if ref.url.startswith('/') else 'relative'] += 1
+        if ref.escapes:
+            escaping.append((line(ref.offset), ref.url))
+        if ref.target not in _files:
+            broken.append((line(ref.offset), ref.url))
+        elif ref.is_link and ref.target != page.rel_path:
+            linked.add(ref.target)
+    return page.rel_path, broken, escaping, styles, linked
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        '--config',
+        help='site config listing the pages to check (default: site_config.json)',
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=0,
+        help='number of worker processes (0 = one per CPU core, default: 0)',
+    )
+    parser.add_argument(
+        '--quiet',
+        action='store_true',
+        help='only report broken references',
+    )
+    args = parser.parse_args()
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+
+    config = load_config(args.config)
+    base_dir = config['base_dir']
+    files = build_file_index(base_dir)
+
+    pages = discover_pages(config)
+    template_source = config['template_source']
+    rel_path = os.path.relpath(template_source, base_dir).replace(os.sep, '/')
+    if os.path.exists(template_source) and rel_path not in {page.rel_path for page in pages}:
+        stat = os.stat(template_source)
+        pages.append(Page(template_source, rel_path, stat.st_mtime_ns, stat.st_size))
+        pages.sort(key=lambda page: page.rel_path)
+
+    print(f"Checking {len(pages)} pages against {len(files)} files\n")
+    if jobs > 1 and len(pages) > 1:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(files,)) as executor:
+            results = list(executor.map(check_page, pages,
+                                        chunksize=max(1, len(pages) // (jobs * 4))))
+    else:
+        _init_worker(files)
+        results = [check_page(page) for page in pages]
+
+    broken_count = 0
+    escaping_pages = []
+    mixed_pages = []
+    linked = set()
+    for rel_path, broken, escaping, styles, page_links in results:
+        linked |= page_links
+        for line, url in broken:
+            print(f"❌ {rel_path}:{line}: broken reference {url}")
+        broken_count += len(broken)
+        if escaping:
+            escaping_pages.append((rel_path, escaping))
+        if styles.get('relative') and styles.get('absolute'):
+            mixed_pages.append((rel_path, styles))
+
+    orphans = [
+        page.rel_path for page in pages
+        if page.rel_path not in linked and page.rel_path != DIRECTORY_INDEX
+    ]
+
+    if not args.quiet:
+        if escaping_pages:
+            print(f"\n⚠️  {len(escaping_pages)} pages have relative references above the site root:")
+            for rel_path, escaping in escaping_pages:
+                line, url = escaping[0]
+                more = f" (+{len(escaping) - 1} more)" if len(escaping) > 1 else ''
+                print(f"  {rel_path}:{line}: {url}{more}")
+        if mixed_pages:
+            print(f"\n⚠️  {len(mixed_pages)} pages mix relative and absolute references:")
+            for rel_path, styles in mixed_pages:
+                print(f"  {rel_path}: {styles['relative']} relative, {styles['absolute']} absolute")
+        if orphans:
+            print(f"\n⚠️  {len(orphans)} pages are not linked from any other page:")
+            for rel_path in orphans:
+                print(f"  {rel_path}")
+
+    print(f"\n{'❌' if broken_count else '✅'} {broken_count} broken references in {len(pages)} pages")
+    if broken_count:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
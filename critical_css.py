@@ -0,0 +1,528 @@
+#!/usr/bin/env python3
+"""
+Inline the critical CSS of each page and load its stylesheets asynchronously.
+
+For every discovered page the elements above the fold are collected: the
+whole document up to the end of the shared <header>, plus the first
+FOLD_ELEMENTS elements of <main>. The contents of elements hidden until
+the visitor opens them (the offcanvas menu, dropdown menus) are left out.
+The rules of the page's local stylesheets (bootstrap.min.css, main.css)
+whose selectors can match those elements are inlined in a
+<style data-critical-css> block, and the stylesheet links are turned into
+preloads that apply on load, with a <noscript> fallback.
+
+Selector matching is deliberately generous - every compound of a selector
+must match some element above the fold, structural pseudo-classes are
+ignored - so the inlined subset errs on the side of too much. Selectors
+for interaction states (:hover, :focus, :active) and custom properties
+the inlined rules don't reference are left out. Critical CSS over
+--max-bytes is reported and not inlined, so those pages keep their
+render-blocking stylesheets. Pages with the same above-the-fold structure
+share one result, cached in memory and in .critical_css_cache.json
+between runs.
+"""
+import argparse
+import hashlib
+import json
+import os
+import posixpath
+import re
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+
+from site_pages import Page, discover_pages, load_config, write_atomic
+from split_languages import VOID_TAGS
+
+# Elements of <main> counted as above the fold
+FOLD_ELEMENTS = 60
+
+# Largest critical CSS inlined into a page
+MAX_CRITICAL_BYTES = 16 * 1024
+
+# Classes of elements whose contents are hidden until the visitor opens them
+HIDDEN_CONTENT_CLASSES = {'offcanvas', 'dropdown-menu', 'modal', 'collapse'}
+
+# Pseudo-classes of interaction states
+INTERACTION_PATTERN = re.compile(r':(?:hover|focus|focus-visible|focus-within|active)\b')
+
+CACHE_NAME = '.critical_css_cache.json'
+
+# Part of the cache key; bumped when the extraction changes
+CACHE_VERSION = 2
+
+# Inlined block, replaced on later runs
+CRITICAL_STYLE_PATTERN = re.compile(
+    r'[ \t]*<style data-critical-css>.*?</style>[ \t]*\n?', re.DOTALL
+)
+
+# A stylesheet link, before or after this script converted it
+STYLESHEET_PATTERN = re.compile(
+    r'(?P<indent>[ \t]*)'
+    r'(?:<link\b(?P<attrs>[^>]*\brel="stylesheet"[^>]*)>'
+    r'|<link\b(?P<preload_attrs>[^>]*\bdata-critical-css[^>]*)>\s*<noscript>.*?</noscript>)',
+    re.DOTALL,
+)
+HREF_PATTERN = re.compile(r'\bhref="([^"]*)"')
+
+COMMENT_PATTERN = re.compile(r'/\*.*?\*/', re.DOTALL)
+
+# Parts of a compound selector
+COMPOUND_PART_PATTERN = re.compile(
+    r'(?P<id>#[\w-]+)|(?P<cls>\.[\w-]+)|(?P<attr>\[\s*[\w-]+)'
+    r'|(?P<pseudo>::?[\w-]+(?:\((?:[^()]|\([^()]*\))*\))?)|(?P<tag>\*|[a-zA-Z][\w-]*)'
+)
+
+# Selectors matching the document or every element
+ALWAYS_MATCHING = {'*', ':root', 'html', 'body'}
+
+# At-rules whose block holds further rules
+GROUPING_AT_RULES = ('@media', '@supports', '@layer', '@container')
+
+ANIMATION_NAME_PATTERN = re.compile(r'animation(?:-name)?\s*:\s*([^;}]+)')
+
+# A custom property declaration, and a reference to one
+CUSTOM_PROPERTY_PATTERN = re.compile(r'(?<=[{;])\s*(--[\w-]+)\s*:[^;}]*;?')
+VAR_PATTERN = re.compile(r'var\(\s*(--[\w-]+)')
+
+EMPTY_RULE_PATTERN = re.compile(r'[^{};]+\{\s*\}')
+
+
+# --- CSS -----------------------------------------------------------------
+
+def _block_end(text, start):
+    """Index just past the '}' closing the block opened before start."""
+    depth = 1
+    i = start
+    while i < len(text):
+        char = text[i]
+        if char in '"\'':
+            i = text.find(char, i + 1)
+            if i == -1:
+                return len(text)
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return len(text)
+
+
+def parse_stylesheet(text):
+    """Parse CSS into a list of nodes.
+
+    A node is ('rule', selectors, declarations), ('group', prelude,
+    children) for @media and friends, or ('at', prelude, text) for any
+    other at-rule such as @keyframes or @font-face.
+    """
+    text = COMMENT_PATTERN.sub('', text)
+    nodes = []
+    pos = 0
+    while pos < len(text):
+        brace = text.find('{', pos)
+        semicolon = text.find(';', pos)
+        prelude_end = brace if brace != -1 else len(text)
+        if text[pos:prelude_end].lstrip().startswith('@') and semicolon != -1 and (
+            brace == -1 or semicolon < brace
+        ):
+            # @charset / @import
+            pos = semicolon + 1
+            continue
+        if brace == -1:
+            break
+        prelude = text[pos:brace].strip()
+        end = _block_end(text, brace + 1)
+        body = text[brace + 1:end - 1]
+        if prelude.startswith(GROUPING_AT_RULES):
+            nodes.append(('group', prelude, parse_stylesheet(body)))
+        elif prelude.startswith('@'):
+            nodes.append(('at', prelude, text[pos:end].strip()))
+        elif prelude:
+            nodes.append(('rule', prelude, body.strip()))
+        pos = end
+    return nodes
+
+
+def split_top_level(text, separators):
+    """Split text on separator characters outside brackets and parentheses."""
+    parts = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(text):
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char in separators and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+def parse_compound(compound):
+    """Return (tag, ids, classes, attributes) of a compound selector."""
+    tag = None
+    ids, classes, attributes = set(), set(), set()
+    for part in COMPOUND_PART_PATTERN.finditer(compound):
+        if part.group('tag'):
+            tag = part.group('tag').lower()
+        elif part.group('id'):
+            ids.add(part.group('id')[1:])
+        elif part.group('cls'):
+            classes.add(part.group('cls')[1:])
+        elif part.group('attr'):
+            attributes.add(part.group('attr')[1:].strip().lower())
+    return tag if tag != '*' else None, ids, classes, attributes
+
+
+class ElementIndex:
+    """The elements above the fold, indexed for selector matching."""
+
+    def __init__(self, elements):
+        self.tags = {tag for tag, _, _, _ in elements}
+        self.ids = {id_ for _, id_, _, _ in elements if id_}
+        self.classes = set().union(*(classes for _, _, classes, _ in elements))
+        self.attributes = set().union(*(attrs for _, _, _, attrs in elements))
+        self.elements = [
+            (tag, id_, frozenset(classes), frozenset(attrs))
+            for tag, id_, classes, attrs in elements
+        ]
+
+    def matches_compound(self, compound):
+        tag, ids, classes, attributes = parse_compound(compound)
+        # Cheap rejections against the union of everything seen first
+        if (tag and tag not in self.tags) or not ids <= self.ids \
+                or not classes <= self.classes or not attributes <= self.attributes:
+            return False
+        return any(
+            (not tag or tag == e_tag) and ids <= ({e_id} if e_id else set())
+            and classes <= e_classes and attributes <= e_attrs
+            for e_tag, e_id, e_classes, e_attrs in self.elements
+        )
+
+    def matches(self, selector):
+        """Whether every compound of the selector matches some element."""
+        compounds = [c for c in split_top_level(selector, ' \t\n>+~') if c]
+        return all(c in ALWAYS_MATCHING or self.matches_compound(c) for c in compounds)
+
+
+def critical_rules(nodes, index, cache):
+    """Return the CSS text of the nodes that can apply above the fold."""
+    output = []
+    for kind, prelude, body in nodes:
+        if kind == 'rule':
+            key = prelude
+            selectors = cache.get(key)
+            if selectors is None:
+                selectors = cache[key] = [
+                    s.strip() for s in split_top_level(prelude, ',')
+                    if not INTERACTION_PATTERN.search(s) and index.matches(s)
+                ]
+            if selectors:
+                output.append(f"{','.join(selectors)}{{{body}}}")
+        elif kind == 'group':
+            inner = critical_rules(body, index, cache)
+            if inner:
+                output.append(f"{prelude}{{{inner}}}")
+    return ''.join(output)
+
+
+def used_keyframes(nodes, css):
+    """Return the @keyframes blocks whose names the critical CSS uses."""
+    names = set()
+    for match in ANIMATION_NAME_PATTERN.finditer(css):
+        names.update(re.findall(r'[\w-]+', match.group(1)))
+    blocks = []
+    for kind, prelude, body in nodes:
+        if kind == 'at' and prelude.split()[0].endswith('keyframes'):
+            parts = prelude.split()
+            if len(parts) > 1 and parts[1] in names:
+                blocks.append(body)
+        elif kind == 'group':
+            blocks.extend(used_keyframes(body, css))
+    return blocks
+
+
+def prune_custom_properties(css):
+    """Drop the custom property declarations the CSS never references."""
+    declarations = {}
+    for match in CUSTOM_PROPERTY_PATTERN.finditer(css):
+        declarations.setdefault(match.group(1), []).append(match.group(0))
+    used = set(VAR_PATTERN.findall(CUSTOM_PROPERTY_PATTERN.sub('', css)))
+    pending = list(used)
+    while pending:
+        for declaration in declarations.get(pending.pop(), ()):
+            for name in VAR_PATTERN.findall(declaration):
+                if name not in used:
+                    used.add(name)
+                    pending.append(name)
+    css = CUSTOM_PROPERTY_PATTERN.sub(
+        lambda match: match.group(0) if match.group(1) in used else '', css
+    )
+    return EMPTY_RULE_PATTERN.sub('', css)
+
+
+_stylesheets = {}
+
+
+def load_stylesheet(path):
+    """Return (sha256, nodes) for a stylesheet, cached by mtime and size."""
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _stylesheets.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+    with open(path, 'rb') as f:
+        data = f.read()
+    result = (hashlib.sha256(data).hexdigest(), parse_stylesheet(data.decode('utf-8')))
+    _stylesheets[path] = (key, result)
+    return result
+
+
+# --- HTML ----------------------------------------------------------------
+
+class _FoldCollector(HTMLParser):
+    """Collects (tag, id, classes, attribute names) of the elements above the fold."""
+
+    def __init__(self, limit):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.elements = []
+        self.in_body = False
+        self.in_main = False
+        self.main_count = 0
+        self.hidden_depth = 0
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        # The head is skipped, so converting its links doesn't change the key
+        if tag == 'body':
+            self.in_body = True
+        if self.done or not self.in_body:
+            return
+        if self.hidden_depth:
+            if tag not in VOID_TAGS:
+                self.hidden_depth += 1
+            return
+        if self.in_main:
+            self.main_count += 1
+            if self.main_count > self.limit:
+                self.done = True
+                return
+        attributes = dict(attrs)
+        # Sorted tuples rather than sets, so the cache key is stable across runs
+        self.elements.append((
+            tag,
+            attributes.get('id'),
+            tuple(sorted(set((attributes.get('class') or '').split()))),
+            tuple(sorted(attributes)),
+        ))
+        if tag == 'main':
+            self.in_main = True
+        if tag not in VOID_TAGS and HIDDEN_CONTENT_CLASSES.intersection(self.elements[-1][2]):
+            self.hidden_depth = 1
+
+    def handle_endtag(self, tag):
+        if self.hidden_depth:
+            if tag not in VOID_TAGS:
+                self.hidden_depth -= 1
+            return
+        if tag == 'main':
+            self.done = True
+
+
+def fold_elements(content, limit=FOLD_ELEMENTS):
+    collector = _FoldCollector(limit)
+    collector.feed(content)
+    return sorted(set(collector.elements), key=repr)
+
+
+def stylesheet_links(content, page_dir, base_dir):
+    """Yield (match, href, path) for the page's local stylesheet links."""
+    for match in STYLESHEET_PATTERN.finditer(content):
+        attrs = match.group('attrs') or match.group('preload_attrs')
+        href = HREF_PATTERN.search(attrs)
+        if not href:
+            continue
+        url = href.group(1)
+        parts = urlsplit(url)
+        if parts.scheme or url.startswith('//'):
+            continue
+        rel_path = urlsplit(urljoin(f'/{page_dir}/' if page_dir else '/', url)).path.lstrip('/')
+        path = os.path.join(base_dir, *rel_path.split('/'))
+        if os.path.isfile(path):
+            yield match, url, path
+
+
+def async_link(indent, href):
+    return (
+        f'{indent}<link rel="preload" as="style" href="{href}" data-critical-css'
+        f' onload="this.onload=null;this.rel=\'stylesheet\'" />\n'
+        f'{indent}<noscript><link rel="stylesheet" href="{href}" /></noscript>'
+    )
+
+
+class CacheUse:
+    """The saved critical CSS per structure, recording which entries are used."""
+
+    def __init__(self, saved):
+        self.saved = saved
+        self.used = {}
+        self.hits = 0
+
+    def get(self, key):
+        css = self.used.get(key)
+        if css is None:
+            css = self.saved.get(key)
+            if css is not None:
+                self.used[key] = css
+        if css is not None:
+            self.hits += 1
+        return css
+
+    def __setitem__(self, key, css):
+        self.used[key] = css
+
+
+def inline_critical_css(content, page_dir, base_dir, cache, fold=FOLD_ELEMENTS,
+                        max_bytes=MAX_CRITICAL_BYTES):
+    """Return (page, size of its critical CSS), or None if it has no stylesheets.
+
+    The critical CSS is inlined if it is at most max_bytes; otherwise the
+    page's stylesheet links are left, or put back, render-blocking. cache
+    maps a key of the fold structure and stylesheet hashes to the critical
+    CSS, and is updated.
+    """
+    content = CRITICAL_STYLE_PATTERN.sub('', content)
+    links = list(stylesheet_links(content, page_dir, base_dir))
+    if not links:
+        return None
+
+    elements = fold_elements(content, fold)
+    # A stylesheet linked twice is only inlined once
+    stylesheets = [load_stylesheet(path) for path in dict.fromkeys(path for _, _, path in links)]
+    key = hashlib.sha256(
+        repr((CACHE_VERSION, elements, [h for h, _ in stylesheets])).encode('utf-8')
+    ).hexdigest()
+    css = cache.get(key)
+    if css is None:
+        index = ElementIndex(elements)
+        selector_cache = {}
+        parts = []
+        for _, nodes in stylesheets:
+            rules = critical_rules(nodes, index, selector_cache)
+            parts.append(rules + ''.join(used_keyframes(nodes, rules)))
+        css = cache[key] = prune_custom_properties(''.join(parts))
+
+    size = len(css.encode('utf-8'))
+    if size > max_bytes:
+        return restore_links(content, links), size
+
+    first = links[0][0]
+    indent = first.group('indent')
+    output = []
+    pos = 0
+    for i, (match, href, _) in enumerate(links):
+        output.append(content[pos:match.start()])
+        if i == 0:
+            output.append(f'{indent}<style data-critical-css>{css}</style>\n')
+        output.append(async_link(match.group('indent'), href))
+        pos = match.end()
+    output.append(content[pos:])
+    return ''.join(output), size
+
+
+def restore_links(content, links):
+    """Turn the stylesheet links this script made asynchronous back into blocking ones."""
+    output = []
+    pos = 0
+    for match, href, _ in links:
+        if match.group('preload_attrs') is not None:
+            output.append(content[pos:match.start()])
+            output.append(f'{match.group("indent")}<link rel="stylesheet" href="{href}" />')
+            pos = match.end()
+    output.append(content[pos:])
+    return ''.join(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        '--config',
+        help='site config listing the pages to process (default: site_config.json)',
+    )
+    parser.add_argument(
+        '--fold',
+        type=int,
+        default=FOLD_ELEMENTS,
+        help=f'elements of <main> counted as above the fold (default: {FOLD_ELEMENTS})',
+    )
+    parser.add_argument(
+        '--max-bytes',
+        type=int,
+        default=MAX_CRITICAL_BYTES,
+        help=f'largest critical CSS to inline into a page (default: {MAX_CRITICAL_BYTES})',
+    )
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    base_dir = config['base_dir']
+
+    pages = discover_pages(config)
+    template_source = config['template_source']
+    rel_path = os.path.relpath(template_source, base_dir).replace(os.sep, '/')
+    if os.path.exists(template_source) and rel_path not in {page.rel_path for page in pages}:
+        stat = os.stat(template_source)
+        pages.append(Page(template_source, rel_path, stat.st_mtime_ns, stat.st_size))
+        pages.sort(key=lambda page: page.rel_path)
+
+    cache_path = os.path.join(base_dir, CACHE_NAME)
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        saved = {}
+    cache = CacheUse(saved)
+
+    updated_count = 0
+    sizes = []
+    for page in pages:
+        try:
+            with open(page.path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            result = inline_critical_css(
+                content, posixpath.dirname(page.rel_path), base_dir, cache,
+                args.fold, args.max_bytes,
+            )
+            if result is None:
+                print(f"⚠️  No local stylesheets in {page.rel_path}")
+                continue
+            new_content, size = result
+            if size > args.max_bytes:
+                print(f"⚠️  Critical CSS of {page.rel_path} is {size} bytes, "
+                      f"over --max-bytes {args.max_bytes}: not inlined")
+            else:
+                sizes.append(size)
+            if new_content != content:
+                write_atomic(page.path, new_content)
+                updated_count += 1
+                print(f"✅ Updated: {page.rel_path}")
+        except Exception as e:
+            print(f"❌ Error processing {page.rel_path}: {e}")
+
+    # Only the structures still in use are kept
+    write_atomic(cache_path, json.dumps(cache.used, sort_keys=True))
+
+    print(f"\n✅ Updated {updated_count} of {len(pages)} pages "
+          f"({len(cache.used)} distinct structures, {cache.hits} cache hits)")
+    if sizes:
+        print(f"   Inlined critical CSS into {len(sizes)} pages: "
+              f"{min(sizes)}-{max(sizes)} bytes, {sum(sizes) // len(sizes)} on average")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Generate sitemap.xml and robots.txt for the discovered pages.
+
+Each page's lastmod is the date its content hash last changed, tracked in
+.sitemap_lastmod.json (keep it between builds), so touching or
+re-checking out a file doesn't make every page look modified. Pages with
+a robots noindex meta tag are left out. Past MAX_URLS the sitemap is split
+into sitemap-<n>.xml files listed by a sitemap index in sitemap.xml.
+
+The /uk/, /en/, /pl/ and /ru/ variants split_languages.py has written are
+listed too, with the page's lastmod. Every URL of a page carries
+xhtml:link hreflang alternates for all its variants, the multilingual
+original being x-default, as in the variants' <head>.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape
+
+from site_pages import Page, discover_pages, load_config, write_atomic
+from split_languages import LANGUAGES, page_url
+
+# Protocol limit per sitemap file
+MAX_URLS = 50000
+
+STATE_NAME = '.sitemap_lastmod.json'
+
+SITEMAP_NAME = 'sitemap.xml'
+
+NOINDEX_PATTERN = re.compile(
+    r'<meta\s[^>]*name=["\']robots["\'][^>]*content=["\'][^"\']*noindex', re.IGNORECASE
+)
+
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+XHTML_NS = 'http://www.w3.org/1999/xhtml'
+
+
+def load_state(state_path):
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def collect_entries(pages, state, today):
+    """Return [(rel_path, lastmod)] for indexable pages, updating state.
+
+    A page keeps its recorded lastmod while its content hash is unchanged.
+    """
+    entries = []
+    for page in pages:
+        with open(page.path, 'rb') as f:
+            data = f.read()
+        if NOINDEX_PATTERN.search(data.decode('utf-8', errors='replace')):
+            continue
+        sha256 = hashlib.sha256(data).hexdigest()
+        entry = state.get(page.rel_path)
+        if not entry or entry['sha256'] != sha256:
+            entry = state[page.rel_path] = {'sha256': sha256, 'lastmod': today}
+        entries.append((page.rel_path, entry['lastmod']))
+    for rel_path in set(state) - {page.rel_path for page in pages}:
+        del state[rel_path]
+    return entries
+
+
+def language_urls(entries, base_dir):
+    """Return [(url, lastmod, alternates)] for the pages and their language variants.
+
+    alternates is [(hreflang, url)], empty for a page without variants.
+    """
+    urls = []
+    for rel_path, lastmod in entries:
+        langs = [
+            lang.code for lang in LANGUAGES
+            if os.path.exists(os.path.join(base_dir, lang.code, *rel_path.split('/')))
+        ]
+        alternates = [(code, page_url(rel_path, code)) for code in langs]
+        if alternates:
+            alternates.append(('x-default', page_url(rel_path)))
+        urls.append((page_url(rel_path), lastmod, alternates))
+        urls.extend((page_url(rel_path, code), lastmod, alternates) for code in langs)
+    return urls
+
+
+def urlset(urls, site_url):
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        f'<urlset xmlns="{SITEMAP_NS}" xmlns:xhtml="{XHTML_NS}">',
+    ]
+    for url, lastmod, alternates in urls:
+        entry = f'  <url><loc>{escape(site_url + url)}</loc><lastmod>{lastmod}</lastmod>'
+        if not alternates:
+            lines.append(entry + '</url>')
+            continue
+        lines.append(entry)
+        for hreflang, href in alternates:
+            lines.append(f'    <xhtml:link rel="alternate" hreflang="{hreflang}"'
+                         f' href="{escape(site_url + href)}" />')
+        lines.append('  </url>')
+    lines.append('</urlset>')
+    return '\n'.join(lines) + '\n'
+
+
+def sitemap_index(chunks, site_url):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', f'<sitemapindex xmlns="{SITEMAP_NS}">']
+    for name, urls in chunks:
+        lastmod = max(lastmod for _, lastmod, _ in urls)
+        lines.append(
+            f'  <sitemap><loc>{escape(f"{site_url}/{name}")}</loc>'
+            f'<lastmod>{lastmod}</lastmod></sitemap>'
+        )
+    lines.append('</sitemapindex>')
+    return '\n'.join(lines) + '\n'
+
+
+def write_if_changed(path, content):
+    """Write a file unless it already has this content; return whether it was written."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                return False
+    except OSError:
+        pass
+    write_atomic(path, content)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--config',
+        help='site config listing the pages to include (default: site_config.json)',
+    )
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    base_dir = config['base_dir']
+    site_url = config['site_url'].rstrip('/')
+
+    pages = discover_pages(config)
+    template_source = config['template_source']
+    rel_path = os.path.relpath(template_source, base_dir).replace(os.sep, '/')
+    if os.path.exists(template_source) and rel_path not in {page.rel_path for page in pages}:
+        stat = os.stat(template_source)
+        pages.append(Page(template_source, rel_path, stat.st_mtime_ns, stat.st_size))
+        pages.sort(key=lambda page: page.rel_path)
+
+    state_path = os.path.join(base_dir, STATE_NAME)
+    state = load_state(state_path)
+    today = datetime.now(timezone.utc).date().isoformat()
+    entries = collect_entries(pages, state, today)
+    urls = language_urls(entries, base_dir)
+
+    # One sitemap, or numbered chunks behind a sitemap index
+    outputs = {}
+    if len(urls) <= MAX_URLS:
+        outputs[SITEMAP_NAME] = urlset(urls, site_url)
+    else:
+        chunks = [
+            (f'sitemap-{n + 1}.xml', urls[start:start + MAX_URLS])
+            for n, start in enumerate(range(0, len(urls), MAX_URLS))
+        ]
+        for name, chunk in chunks:
+            outputs[name] = urlset(chunk, site_url)
+        outputs[SITEMAP_NAME] = sitemap_index(chunks, site_url)
+
+    # Chunks left over from a larger site
+    for name in os.listdir(base_dir):
+        if re.fullmatch(r'sitemap-\d+\.xml', name) and name not in outputs:
+            os.unlink(os.path.join(base_dir, name))
+            print(f"🗑️  Removed {name}")
+
+    outputs['robots.txt'] = f"User-agent: *\nAllow: /\n\nSitemap: {site_url}/{SITEMAP_NAME}\n"
+
+    for name, content in outputs.items():
+        if write_if_changed(os.path.join(base_dir, name), content):
+            print(f"✅ Wrote {name}")
+    write_if_changed(state_path, json.dumps(state, indent=2, sort_keys=True) + '\n')
+
+    print(f"\n✅ {len(entries)} of {len(pages)} pages in the sitemap "
+          f"({len(urls)} URLs with the language variants)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Whitespace and comment minifier for the site's pages.
+
+Text is only ever changed by collapsing runs of whitespace, so the
+".."-separated multilingual strings come out intact. The contents of
+<pre>, <textarea>, <script> and <style> are copied verbatim, and comments
+in PRESERVED_COMMENTS (the marker replace_headers.py looks for), the
+fragment include markers and conditional comments are kept. Output is
+stable: minifying a minified page returns it unchanged.
+"""
+import re
+
+# Comments other scripts rely on
+PRESERVED_COMMENTS = ('<!-- Header -->',)
+PRESERVED_COMMENT_PREFIXES = ('<!--[', '<!-- partial:', '<!-- /partial:')
+
+# Elements whose content is copied as is
+RAW_TEXT_ELEMENTS = ('pre', 'textarea', 'script', 'style')
+
+# Whitespace next to these tags is never rendered, so it can be dropped
+BLOCK_ELEMENTS = frozenset('''
+    address article aside blockquote body dd details div dl dt fieldset
+    figcaption figure footer form h1 h2 h3 h4 h5 h6 head header hr html li
+    link main meta nav noscript ol option p script section style summary
+    table tbody td tfoot th thead title tr ul
+'''.split())
+
+TOKEN_PATTERN = re.compile(
+    r'(?P<comment><!--.*?-->)'
+    rf'|(?P<raw>(?P<raw_open><(?P<raw_name>{"|".join(RAW_TEXT_ELEMENTS)})\b'
+    r'(?:"[^"]*"|\'[^\']*\'|[^\'">])*>).*?</(?P=raw_name)\s*>)'
+    r'|(?P<tag><[!/]?[a-zA-Z](?:"[^"]*"|\'[^\']*\'|[^\'">])*>)'
+    r'|(?P<text>[^<]+|<)',
+    re.DOTALL | re.IGNORECASE,
+)
+
+TAG_NAME_PATTERN = re.compile(r'<[!/]?([a-zA-Z][\w-]*)')
+
+# Whitespace inside a tag, outside quoted attribute values
+TAG_SPACE_PATTERN = re.compile(r'("[^"]*"|\'[^\']*\')|\s+')
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def _minify_tag(tag):
+    tag = TAG_SPACE_PATTERN.sub(lambda m: m.group(1) or ' ', tag)
+    if tag.endswith(' >'):
+        tag = tag[:-2] + '>'
+    return tag
+
+
+def _is_block(token):
+    """Whether whitespace next to this tag or comment is insignificant."""
+    if token.startswith('<!'):
+        return True
+    match = TAG_NAME_PATTERN.match(token)
+    return bool(match) and match.group(1).lower() in BLOCK_ELEMENTS
+
+
+def minify_html(content):
+    """Return content with insignificant whitespace and comments removed."""
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(content):
+        kind = match.lastgroup
+        token = match.group(0)
+        if kind == 'comment':
+            if (token not in PRESERVED_COMMENTS
+                    and not token.startswith(PRESERVED_COMMENT_PREFIXES)):
+                continue
+        elif kind == 'raw':
+            opening = match.group('raw_open')
+            token = _minify_tag(opening) + token[len(opening):]
+        elif kind == 'tag':
+            token = _minify_tag(token)
+        elif kind == 'text':
+            # Merge with a preceding text token (split off at a stray '<'
+            # or a dropped comment)
+            if tokens and tokens[-1][0] == 'text':
+                token = tokens.pop()[1] + token
+            token = WHITESPACE_PATTERN.sub(' ', token)
+        tokens.append((kind, token))
+
+    output = []
+    for i, (kind, token) in enumerate(tokens):
+        if kind == 'text':
+            previous = tokens[i - 1][1] if i > 0 else None
+            following = tokens[i + 1][1] if i + 1 < len(tokens) else None
+            if previous is None or _is_block(previous):
+                token = token.lstrip()
+            if following is None or _is_block(following):
+                token = token.rstrip()
+            if not token:
+                continue
+        output.append(token)
+    return ''.join(output)
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Add width/height and a blurred placeholder to the <img> tags of every page.
+
+Dimensions are read from the PNG, WebP, GIF or JPEG header of each image
+under assets/images, without decoding it, and kept in
+.image_metadata.json keyed by the file's content hash; a file is only
+re-hashed when its mtime or size changed, and only new hashes are read.
+
+Every <img> with neither a width nor a height attribute gets both, so the
+browser reserves its box before the image arrives. Opaque images of at
+least LQIP_MIN_BYTES also get a tiny blurred preview as their inline
+background (an SVG blur over a LQIP_SIZE px WebP; the SVG is URL-encoded,
+as base64-encoding it would encode the base64 WebP a second time).
+Placeholders need Pillow (pip install Pillow); without it only the
+dimensions are added, and a later run with Pillow fills the placeholders
+in.
+"""
+import argparse
+import base64
+import io
+import json
+import os
+import re
+import struct
+from urllib.parse import quote, urljoin, urlsplit
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+from responsive_images import IMAGE_DIR, IMG_TAG_PATTERN, file_sha256, set_attribute
+from site_pages import discover_pages, load_config, write_atomic
+
+INDEX_NAME = '.image_metadata.json'
+
+IMAGE_EXTENSIONS = ('.webp', '.png', '.gif', '.jpg', '.jpeg')
+
+# Longest side of the placeholder preview, in pixels
+LQIP_SIZE = 16
+
+# Images smaller than this load fast enough to go without a placeholder
+LQIP_MIN_BYTES = 10 * 1024
+
+LQIP_SVG = (
+    "<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 {width} {height}'>"
+    "<filter id='b' color-interpolation-filters='sRGB'><feGaussianBlur stdDeviation='{blur}'/>"
+    "<feComponentTransfer><feFuncA type='discrete' tableValues='1 1'/></feComponentTransfer>"
+    "</filter><image width='100%' height='100%' preserveAspectRatio='none' filter='url(#b)' "
+    "href='data:image/webp;base64,{data}'/></svg>"
+)
+
+SVG_URI_PREFIX = 'data:image/svg+xml,'
+
+# How placeholders were encoded before; converted when the index is updated
+BASE64_SVG_URI_PREFIX = 'data:image/svg+xml;base64,'
+
+# Characters of the placeholder SVG left as they are in its data URI
+SVG_URI_SAFE = " '=:/,.;+-()!*~_"
+
+# The placeholder declarations, as added to an <img>'s style (URL-encoded
+# in a quoted url(), or base64 in a bare one as written before)
+LQIP_STYLE_PATTERN = re.compile(
+    r'\s*background:\s*url\((?:&quot;data:image/svg\+xml,.*?&quot;'
+    r'|data:image/svg\+xml;base64,[^)]*)\)[^;"]*;?'
+)
+
+STYLE_PATTERN = re.compile(r'\sstyle\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+SRC_PATTERN = re.compile(r'\ssrc\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+
+
+def read_dimensions(path):
+    """Return (width, height, has alpha) from an image's header, or None."""
+    with open(path, 'rb') as f:
+        head = f.read(32)
+        if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+            width, height = struct.unpack('>II', head[16:24])
+            color_type = head[25]
+            has_alpha = color_type in (4, 6) or _png_has_trns(f)
+            return width, height, has_alpha
+        if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+            chunk = head[12:16]
+            if chunk == b'VP8 ':
+                width, height = struct.unpack('<HH', head[26:30])
+                return width & 0x3fff, height & 0x3fff, False
+            if chunk == b'VP8L':
+                bits = int.from_bytes(head[21:25], 'little')
+                return (bits & 0x3fff) + 1, ((bits >> 14) & 0x3fff) + 1, bool(bits >> 28 & 1)
+            if chunk == b'VP8X':
+                width = int.from_bytes(head[24:27], 'little') + 1
+                height = int.from_bytes(head[27:30], 'little') + 1
+                return width, height, bool(head[20] & 0x10)
+            return None
+        if head[:6] in (b'GIF87a', b'GIF89a'):
+            width, height = struct.unpack('<HH', head[6:10])
+            return width, height, True
+        if head[:2] == b'\xff\xd8':
+            f.seek(2)
+            return _jpeg_dimensions(f)
+    return None
+
+
+def _png_has_trns(f):
+    """Whether a PNG has a tRNS chunk before its image data."""
+    f.seek(8)
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            return False
+        length, kind = struct.unpack('>I4s', header)
+        if kind == b'tRNS':
+            return True
+        if kind == b'IDAT':
+            return False
+        f.seek(length + 4, os.SEEK_CUR)
+
+
+def _jpeg_dimensions(f):
+    """Walk the JPEG markers up to the start-of-frame segment."""
+    while True:
+        byte = f.read(1)
+        while byte and byte != b'\xff':
+            byte = f.read(1)
+        while byte == b'\xff':
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker in (0xd8, 0x01) or 0xd0 <= marker <= 0xd7:
+            continue
+        length = struct.unpack('>H', f.read(2))[0]
+        # SOF0..SOF15, except DHT, JPG and DAC
+        if 0xc0 <= marker <= 0xcf and marker not in (0xc4, 0xc8, 0xcc):
+            height, width = struct.unpack('>xHH', f.read(5))
+            return width, height, False
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def make_placeholder(path, width, height):
+    """Return the placeholder's data URI, or None without Pillow."""
+    if Image is None:
+        return None
+    with Image.open(path) as image:
+        image.draft('RGB', (LQIP_SIZE, LQIP_SIZE))
+        image = image.convert('RGB')
+        image.thumbnail((LQIP_SIZE, LQIP_SIZE))
+        buffer = io.BytesIO()
+        image.save(buffer, 'WEBP', quality=30)
+    svg = LQIP_SVG.format(
+        width=width, height=height, blur=max(width, height) / LQIP_SIZE,
+        data=base64.b64encode(buffer.getvalue()).decode('ascii'),
+    )
+    return svg_data_uri(svg)
+
+
+def svg_data_uri(svg):
+    """URL-encode an SVG into a data URI, escaping only what has to be."""
+    return SVG_URI_PREFIX + quote(svg, safe=SVG_URI_SAFE)
+
+
+def load_index(index_path):
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    index.setdefault('files', {})
+    index.setdefault('images', {})
+    return index
+
+
+def update_index(base_dir, index):
+    """Bring the index up to date with the images on disk.
+
+    Returns the number of images whose metadata was (re)computed.
+    """
+    files = {}
+    images = {}
+    computed = 0
+    for root, dirs, names in os.walk(os.path.join(base_dir, *IMAGE_DIR.split('/'))):
+        dirs.sort()
+        rel_root = os.path.relpath(root, base_dir).replace(os.sep, '/')
+        for name in sorted(names):
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            rel_path = f'{rel_root}/{name}'
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            known = index['files'].get(rel_path)
+            if known and known[:2] == [stat.st_mtime_ns, stat.st_size]:
+                sha256 = known[2]
+            else:
+                sha256 = file_sha256(path)
+            files[rel_path] = [stat.st_mtime_ns, stat.st_size, sha256]
+
+            entry = images.get(sha256) or index['images'].get(sha256)
+            changed = False
+            if entry is None:
+                dimensions = read_dimensions(path)
+                if dimensions is None:
+                    print(f"⚠️  Unrecognised image format: {rel_path}")
+                    continue
+                width, height, has_alpha = dimensions
+                entry = {'width': width, 'height': height, 'alpha': has_alpha, 'lqip': None}
+                changed = True
+            lqip = entry['lqip']
+            if lqip and lqip.startswith(BASE64_SVG_URI_PREFIX):
+                svg = base64.b64decode(lqip[len(BASE64_SVG_URI_PREFIX):]).decode('utf-8')
+                entry['lqip'] = svg_data_uri(svg)
+            wants_lqip = not entry['alpha'] and stat.st_size >= LQIP_MIN_BYTES
+            if wants_lqip and entry['lqip'] is None and Image is not None:
+                entry['lqip'] = make_placeholder(path, entry['width'], entry['height'])
+                changed = True
+            computed += changed
+            images[sha256] = entry
+    index['files'] = files
+    index['images'] = images
+    return computed
+
+
+def set_placeholder(tag, lqip):
+    """Put the placeholder into the tag's style, replacing an earlier one."""
+    style = STYLE_PATTERN.search(tag)
+    value = (style.group(1) if style.group(1) is not None else style.group(2)) if style else ''
+    declarations = LQIP_STYLE_PATTERN.sub('', value).strip()
+    if declarations and not declarations.endswith(';'):
+        declarations += ';'
+    background = f'background: url(&quot;{lqip}&quot;) center / cover no-repeat;'
+    return set_attribute(tag, 'style', f'{declarations} {background}'.strip(), after='src')
+
+
+def rewrite_img_tags(content, page_dir, index):
+    """Add width/height and placeholders to the page's local <img> tags."""
+    lookup = index['files']
+    images = index['images']
+
+    def replace(match):
+        tag = match.group(0)
+        src = SRC_PATTERN.search(tag)
+        if not src:
+            return tag
+        url = (src.group(1) if src.group(1) is not None else src.group(2)).strip()
+        if not url or url.startswith('//') or urlsplit(url).scheme:
+            return tag
+        rel_path = urlsplit(urljoin(f'/{page_dir}/' if page_dir else '/', url)).path.lstrip('/')
+        known = lookup.get(rel_path)
+        entry = known and images.get(known[2])
+        if not entry:
+            return tag
+        has_width = re.search(r'\swidth\s*=', tag)
+        has_height = re.search(r'\sheight\s*=', tag)
+        # Sized by the author on one side: leave it as it is
+        if bool(has_width) != bool(has_height):
+            return tag
+        if not has_width:
+            tag = set_attribute(tag, 'width', str(entry['width']), after='src')
+            tag = set_attribute(tag, 'height', str(entry['height']), after='width')
+        if entry['lqip']:
+            tag = set_placeholder(tag, entry['lqip'])
+        return tag
+
+    return IMG_TAG_PATTERN.sub(replace, content)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        '--config',
+        help='site config listing the pages to process (default: site_config.json)',
+    )
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    base_dir = config['base_dir']
+    index_path = os.path.join(base_dir, INDEX_NAME)
+    index = load_index(index_path)
+    computed = update_index(base_dir, index)
+    write_atomic(index_path, json.dumps(index, indent=2, sort_keys=True) + '\n')
+    if Image is None:
+        print("⚠️  Pillow is not installed: adding dimensions only, no placeholders")
+
+    # The template source carries the shared header, so it is rewritten too
+    page_paths = [page.path for page in discover_pages(config)]
+    if os.path.exists(config['template_source']):
+        page_paths.append(config['template_source'])
+
+    updated_count = 0
+    for path in sorted(set(page_paths)):
+        rel_path = os.path.relpath(path, base_dir).replace(os.sep, '/')
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            new_content = rewrite_img_tags(content, os.path.dirname(rel_path), index)
+            if new_content != content:
+                write_atomic(path, new_content)
+                updated_count += 1
+                print(f"✅ Updated: {rel_path}")
+        except Exception as e:
+            print(f"❌ Error processing {rel_path}: {e}")
+
+    print(f"\n✅ Read {computed} new or changed images of {len(index['files'])}; "
+          f"updated {updated_count} of {len(page_paths)} pages")
+
+
+if __name__ == '__main__':
+    main()
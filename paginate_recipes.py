@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Pre-paginate the recipe grid of recipes.html into static pages.
+
+recipes.html shows the first "per_page" recipes of its listing in
+listings.json (render_listings.py renders them). The recipes are split
+into pages of per_page cards, for all recipes and for each category of
+the filter list, written under recipes/:
+
+- <filter>-<n>.html: a copy of recipes.html showing only that page's cards,
+- <filter>-<n>.cards.html: just the cards, for infinite scroll,
+
+where <filter> is 'all' or the category's class name; the first page of
+'all' is recipes.html itself. manifest.json lists the pages and card
+fragments per filter with the category labels. The pages sit one level
+below the root like recipe_details/, so the header and footer work as
+replace_header_footer.py splices them; other relative URLs copied from
+recipes.html are made root-absolute.
+
+Every page, recipes.html included, gets its own canonical URL,
+rel=prev/next links and a pagination nav, its filter list links to the
+category pages, and the client-side filtering and pagination scripts are
+dropped, so no page carries more than one page of cards.
+
+The cards are keyed includes rendered from the catalog as on the listing
+pages. Cards already in a generated page are kept as they are while their
+partial and parameters are unchanged, so what later stages add to them
+(image dimensions, srcset) survives; recipes/ is part of the site pages
+in site_config.json, so those stages process the generated pages too.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+
+from asset_fingerprints import strip_fingerprint
+from build_catalog import update_catalog
+from html_minify import minify_html
+from replace_header_footer import find_elements
+from render_listings import (
+    DIV_TAG_PATTERN, LISTINGS_NAME, filter_list, grid_cards, load_listings, render_grid,
+)
+from site_pages import load_config, write_atomic
+from split_languages import rewrite_url
+from template_registry import load_fragments
+
+SOURCE_PAGE = 'recipes.html'
+OUTPUT_DIR = 'recipes'
+
+# Name of the filter showing every recipe
+ALL_FILTER = 'all'
+
+GRID_OPEN_PATTERN = re.compile(r'<div\b[^>]*\bid="recipe-grid"[^>]*>')
+URL_ATTRIBUTE_PATTERN = re.compile(r'(\s(?:href|src)=")([^"]*)(")')
+
+# An entry of the filter list, '*' standing for all recipes
+FILTER_ITEM_PATTERN = re.compile(
+    r'(?P<start><li\b[^>]*\bdata-filter="(?P<filter>\*|\.[\w-]+)"[^>]*>)(?P<space>\s*)'
+    r'(?:<a\b[^>]*>(?P<linked>.*?)</a>|(?P<label>.*?))(?P<end>\s*</li>)',
+    re.DOTALL,
+)
+CLASS_PATTERN = re.compile(r'\bclass="([^"]*)"')
+
+CANONICAL_PATTERN = re.compile(r'(<link\b[^>]*\brel="canonical"[^>]*\bhref=")[^"]*(")')
+PAGE_LINK_PATTERN = re.compile(r'[ \t]*<link rel="(?:prev|next)" href="[^"]*" />\n?')
+PAGINATION_NAV_PATTERN = re.compile(r'\n?[ \t]*<nav class="recipes-pagination\b.*?</nav>', re.DOTALL)
+INCLUDE_MARKER_PATTERN = re.compile(r'[ \t]*<!-- /?partial:.*?-->\n?')
+SCRIPT_PATTERN = re.compile(r'[ \t]*<script\b[^>]*\bsrc="([^"]*)"[^>]*>\s*</script>[ \t]*\n?')
+
+# Scripts filtering and paginating the grid in the browser
+CLIENT_SCRIPTS = ('recipes_lazy_pages.js', 'recipes_min.js', 'isotope.pkgd.min.js')
+
+# Labels of the pagination links, in the ".."-separated page format
+PREVIOUS_LABEL = 'Назад..Previous..Wstecz..Назад'
+NEXT_LABEL = 'Далі..Next..Dalej..Далее'
+
+
+def find_grid(content):
+    """Return (body start, body end) of #recipe-grid, matching nested divs."""
+    match = GRID_OPEN_PATTERN.search(content)
+    if not match:
+        raise ValueError(f"No #recipe-grid in {SOURCE_PAGE}")
+    depth = 1
+    for tag in DIV_TAG_PATTERN.finditer(content, match.end()):
+        depth += -1 if tag.group(0).startswith('</') else 1
+        if depth == 0:
+            return match.end(), tag.start()
+    raise ValueError(f"Unterminated #recipe-grid in {SOURCE_PAGE}")
+
+
+def absolute_urls(content):
+    """Make the relative href/src URLs of the root-level page root-absolute.
+
+    The header and footer are left alone for replace_header_footer.py.
+    """
+
+    def rewrite(part):
+        return URL_ATTRIBUTE_PATTERN.sub(
+            lambda m: m.group(1) + rewrite_url(m.group(2), '', frozenset(), None) + m.group(3),
+            part,
+        )
+
+    parts = []
+    pos = 0
+    for start, end, _ in find_elements(content):
+        parts.append(rewrite(content[pos:start]))
+        parts.append(content[start:end])
+        pos = end
+    parts.append(rewrite(content[pos:]))
+    return ''.join(parts)
+
+
+def page_path(filter_name, number, suffix='.html'):
+    if filter_name == ALL_FILTER and number == 1 and suffix == '.html':
+        return SOURCE_PAGE
+    return f'{OUTPUT_DIR}/{filter_name}-{number}{suffix}'
+
+
+def pagination_nav(filter_name, number, page_count, indent):
+    links = []
+    if number > 1:
+        links.append(f'<a class="button-recipe-text multilingual-text m-2" rel="prev" '
+                     f'href="/{page_path(filter_name, number - 1)}">{PREVIOUS_LABEL}</a>')
+    if number < page_count:
+        links.append(f'<a class="button-recipe-text multilingual-text m-2" rel="next" '
+                     f'href="/{page_path(filter_name, number + 1)}">{NEXT_LABEL}</a>')
+    if not links:
+        return ''
+    inner = ''.join(f'\n{indent}  {link}' for link in links)
+    return f'\n{indent}<nav class="recipes-pagination text-center my-5">{inner}\n{indent}</nav>'
+
+
+def filter_links(content, filter_name):
+    """Point the filter list at the category pages, marking the current one."""
+
+    def replace(match):
+        name = ALL_FILTER if match.group('filter') == '*' else match.group('filter')[1:]
+        start = match.group('start')
+        classes = CLASS_PATTERN.search(start)
+        names = classes.group(1).split() if classes else []
+        names = [c for c in names if c not in ('filter-active', 'multilingual-text')]
+        if name == filter_name:
+            names.insert(0, 'filter-active')
+        if classes:
+            start = f'{start[:classes.start(1)]}{" ".join(names)}{start[classes.end(1):]}'
+        label = match.group('linked') if match.group('linked') is not None else match.group('label')
+        link = (f'<a class="multilingual-text text-reset text-decoration-none" '
+                f'href="/{page_path(name, 1)}">{label}</a>')
+        return f"{start}{match.group('space')}{link}{match.group('end')}"
+
+    return FILTER_ITEM_PATTERN.sub(replace, content)
+
+
+def paginate(content, filter_name, number, page_count, site_url):
+    """Add a page's canonical URL, prev/next links and nav to a copy of recipes.html.
+
+    The filter list before the grid is turned into links and the
+    client-side filtering and pagination scripts are dropped. A minified
+    page is minified again.
+    """
+    content = PAGE_LINK_PATTERN.sub('', PAGINATION_NAV_PATTERN.sub('', content))
+    content = SCRIPT_PATTERN.sub(
+        lambda m: '' if strip_fingerprint(m.group(1).rsplit('/', 1)[-1]) in CLIENT_SCRIPTS
+        else m.group(0),
+        content,
+    )
+    start, end = find_grid(content)
+    content = filter_links(content[:start], filter_name) + content[start:]
+    start, end = find_grid(content)
+
+    closing_start = content.rfind('\n', 0, end) + 1
+    indent = content[closing_start:end] if not content[closing_start:end].strip() else ''
+    after_grid = content.find('>', end) + 1
+    content = (content[:after_grid] + pagination_nav(filter_name, number, page_count, indent)
+               + content[after_grid:])
+
+    canonical = f'{site_url}/{page_path(filter_name, number)}'
+    content, found = CANONICAL_PATTERN.subn(rf'\g<1>{canonical}\g<2>', content, count=1)
+    head_links = [] if found else [f'<link rel="canonical" href="{canonical}" />']
+    if number > 1:
+        head_links.append(f'<link rel="prev" href="/{page_path(filter_name, number - 1)}" />')
+    if number < page_count:
+        head_links.append(f'<link rel="next" href="/{page_path(filter_name, number + 1)}" />')
+    head_end = content.find('</head>')
+    line_start = content.rfind('\n', 0, head_end) + 1
+    if content[line_start:head_end].strip():
+        # A minified page stays minified
+        return minify_html(content[:head_end] + ''.join(head_links) + content[head_end:])
+    head_indent = content[line_start:head_end] + '  '
+    return (content[:line_start] + ''.join(f'{head_indent}{link}\n' for link in head_links)
+            + content[line_start:])
+
+
+def render_page(template, previous, listing, items, catalog, fragments):
+    """Return recipes.html with the grid holding the cards of the given items.
+
+    Cards of previous, the page as written before, are reused while their
+    partial and parameters are unchanged.
+    """
+    start, end = find_grid(template)
+    if previous is not None:
+        try:
+            previous_start, previous_end = find_grid(previous)
+        except ValueError:
+            pass
+        else:
+            template = template[:start] + previous[previous_start:previous_end] + template[end:]
+    page_listing = dict(listing, items=items, per_page=None)
+    return render_grid(template, page_listing, catalog, fragments)[0]
+
+
+def grid_cards_markup(page):
+    """The card blocks of a rendered page, without their include markers."""
+    start, end = find_grid(page)
+    closing_start = page.rfind('\n', start, end) + 1 or end
+    return INCLUDE_MARKER_PATTERN.sub('', page[start:closing_start]).lstrip('\n')
+
+
+def read_if_exists(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def write_if_changed(path, content):
+    if read_if_exists(path) == content:
+        return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_atomic(path, content)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--config',
+        help='site config locating the site root (default: site_config.json)',
+    )
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    base_dir = config['base_dir']
+    site_url = config['site_url'].rstrip('/')
+    listing = load_listings(base_dir).get(SOURCE_PAGE)
+    if not listing or not listing.get('per_page'):
+        print(f"❌ Set per_page for {SOURCE_PAGE} in {LISTINGS_NAME}")
+        sys.exit(1)
+    per_page = listing['per_page']
+    catalog, changed = update_catalog(config)
+    if changed:
+        print()
+    fragments = load_fragments(config['partials_dir'])
+
+    source_path = os.path.join(base_dir, SOURCE_PAGE)
+    with open(source_path, 'r', encoding='utf-8') as f:
+        source = f.read()
+    start = find_grid(source)[0]
+    categories = dict(filter_list(source[:start]))
+    template = absolute_urls(source)
+
+    items = listing['items']
+    try:
+        cards = grid_cards(source, start, listing, catalog)
+    except ValueError as e:
+        print(f"❌ {SOURCE_PAGE}: {e}")
+        sys.exit(1)
+    filters = {ALL_FILTER: items}
+    for name in categories:
+        filters[name] = [
+            item for item, (_, params) in zip(items, cards) if params.get('category') == name
+        ]
+
+    outputs = {}
+    manifest = {'items_per_page': per_page, 'filters': {}}
+    for filter_name, filter_items in filters.items():
+        pages = [filter_items[i:i + per_page] for i in range(0, len(filter_items), per_page)]
+        entry = manifest['filters'][filter_name] = {
+            'label': categories.get(filter_name),
+            'count': len(filter_items),
+            'pages': [],
+            'cards': [],
+        }
+        for number, page_items in enumerate(pages, start=1):
+            html_path = page_path(filter_name, number)
+            cards_path = page_path(filter_name, number, '.cards.html')
+            if html_path == SOURCE_PAGE:
+                # The grid of recipes.html belongs to render_listings.py
+                page = source
+            else:
+                previous = read_if_exists(os.path.join(base_dir, *html_path.split('/')))
+                try:
+                    page = render_page(template, previous, listing, page_items, catalog, fragments)
+                except ValueError as e:
+                    print(f"❌ {html_path}: {e}")
+                    sys.exit(1)
+            outputs[html_path] = paginate(page, filter_name, number, len(pages), site_url)
+            outputs[cards_path] = grid_cards_markup(page)
+            entry['pages'].append(f'/{html_path}')
+            entry['cards'].append(f'/{cards_path}')
+    outputs[f'{OUTPUT_DIR}/manifest.json'] = json.dumps(
+        manifest, ensure_ascii=False, indent=2
+    ) + '\n'
+
+    updated = 0
+    for rel_path, content in outputs.items():
+        if write_if_changed(os.path.join(base_dir, *rel_path.split('/')), content):
+            updated += 1
+            print(f"✅ Wrote {rel_path}")
+
+    # Pages of categories or page numbers that no longer exist
+    for name in os.listdir(os.path.join(base_dir, OUTPUT_DIR)):
+        rel_path = f'{OUTPUT_DIR}/{name}'
+        if rel_path not in outputs and name.endswith('.html'):
+            os.unlink(os.path.join(base_dir, OUTPUT_DIR, name))
+            print(f"🗑️  Removed {rel_path}")
+
+    print(f"\n✅ {len(items)} recipes in {len(filters)} filters, "
+          f"{per_page} per page ({updated} files updated)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Write precompressed .gz (and .br, if the brotli module is installed)
+siblings of the site's pages, stylesheets and scripts, so the host can
+serve them without compressing on every request.
+
+Run after replace_header_footer.py. Files are compressed in a process
+pool; a manifest of source hashes skips files that haven't changed since
+the last run. Compressed copies are written atomically, and those of
+files that are gone or now below MIN_SIZE are removed.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from site_pages import discover_pages, load_config, match_path, write_atomic
+
+# Stored in the site root between runs
+MANIFEST_NAME = '.precompress_manifest.json'
+
+# Static assets compressed besides the pages
+ASSET_PATTERNS = ('src/**/*.css', 'src/**/*.js')
+
+# Smaller files aren't worth a compressed copy
+MIN_SIZE = 1024
+
+SUFFIXES = ('.gz', '.br')
+
+
+def find_assets(base_dir):
+    """Return the relative paths of the CSS/JS files under src/."""
+    assets = []
+    for root, dirs, files in os.walk(os.path.join(base_dir, 'src')):
+        dirs[:] = sorted(d for d in dirs if d != 'node_modules' and not d.startswith('.'))
+        rel_root = os.path.relpath(root, base_dir).replace(os.sep, '/')
+        for name in sorted(files):
+            rel_path = f'{rel_root}/{name}'
+            if any(match_path(rel_path, pattern) for pattern in ASSET_PATTERNS):
+                assets.append(rel_path)
+    return assets
+
+
+def compress_file(path):
+    """Write the compressed siblings of a file; return their sizes.
+
+    Returns {'original': bytes, 'gz': bytes, 'br': bytes or None}. The gzip
+    header carries no timestamp, so unchanged input gives identical output.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    sizes = {'original': len(data), 'gz': None, 'br': None}
+
+    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    write_atomic(path + '.gz', compressed)
+    sizes['gz'] = len(compressed)
+
+    if brotli is not None:
+        compressed = brotli.compress(data, quality=11)
+        write_atomic(path + '.br', compressed)
+        sizes['br'] = len(compressed)
+    else:
+        remove_siblings(path, ('.br',))
+    return sizes
+
+
+def remove_siblings(path, suffixes=SUFFIXES):
+    """Delete the compressed copies of a file; return how many there were."""
+    removed = 0
+    for suffix in suffixes:
+        try:
+            os.unlink(path + suffix)
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def _compress_job(path):
+    try:
+        return compress_file(path), None
+    except Exception as e:
+        return None, str(e)
+
+
+def file_sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_manifest(manifest_path):
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def ratio(original, compressed):
+    return f"{compressed / original:6.1%}" if compressed is not None else '     -'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--config',
+        help='site config listing the pages to process (default: site_config.json)',
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=0,
+        help='number of worker processes (0 = one per CPU core, default: 0)',
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='ignore the manifest and compress every file',
+    )
+    args = parser.parse_args()
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+
+    config = load_config(args.config)
+    base_dir = config['base_dir']
+    if brotli is None:
+        print("⚠️  brotli module not installed - writing .gz files only")
+
+    rel_paths = [page.rel_path for page in discover_pages(config)]
+    template_source = config['template_source']
+    if os.path.exists(template_source):
+        rel_paths.append(os.path.relpath(template_source, base_dir).replace(os.sep, '/'))
+    rel_paths = sorted(set(rel_paths)) + find_assets(base_dir)
+
+    manifest_path = os.path.join(base_dir, MANIFEST_NAME)
+    manifest = {} if args.force else load_manifest(manifest_path)
+    want_br = brotli is not None
+
+    pending = []
+    hashes = {}
+    removed = 0
+    for rel_path in rel_paths:
+        path = os.path.join(base_dir, *rel_path.split('/'))
+        if os.path.getsize(path) < MIN_SIZE:
+            # Shrunk below the threshold since it was compressed
+            removed += remove_siblings(path)
+            continue
+        hashes[rel_path] = sha256 = file_sha256(path)
+        entry = manifest.get(rel_path)
+        if (entry and entry['sha256'] == sha256 and (entry['br'] is not None) == want_br
+                and os.path.exists(path + '.gz')):
+            continue
+        pending.append(rel_path)
+
+    paths = [os.path.join(base_dir, *rel_path.split('/')) for rel_path in pending]
+    if jobs > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(_compress_job, paths, chunksize=8))
+    else:
+        results = [_compress_job(path) for path in paths]
+
+    if pending:
+        width = max(len(rel_path) for rel_path in pending)
+        print(f"  {'file':<{width}}  {'bytes':>9}  {'gzip':>6}  {'brotli':>6}")
+    for rel_path, (sizes, error) in zip(pending, results):
+        if error:
+            print(f"❌ Error compressing {rel_path}: {error}")
+            manifest.pop(rel_path, None)
+            continue
+        manifest[rel_path] = {'sha256': hashes[rel_path], **sizes}
+        print(f"  {rel_path:<{width}}  {sizes['original']:9d}  "
+              f"{ratio(sizes['original'], sizes['gz'])}  {ratio(sizes['original'], sizes['br'])}")
+
+    # Forget files that are gone or too small now, with their compressed copies
+    for rel_path in sorted(set(manifest) - set(hashes)):
+        del manifest[rel_path]
+        removed += remove_siblings(os.path.join(base_dir, *rel_path.split('/')))
+    write_atomic(manifest_path, json.dumps(manifest, indent=2, sort_keys=True))
+
+    print(f"\n✅ Compressed {len(pending)} files ({len(hashes) - len(pending)} unchanged)")
+    if removed:
+        print(f"🗑️  Removed {removed} stale compressed files")
+    if manifest:
+        original = sum(entry['original'] for entry in manifest.values())
+        gz = sum(entry['gz'] for entry in manifest.values())
+        print(f"   {len(manifest)} files: {original} -> {gz} bytes gzipped"
+              f" ({ratio(original, gz).strip()})")
+
+
+if __name__ == '__main__':
+    main()
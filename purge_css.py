@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Write a copy of the vendored Bootstrap stylesheet without the unused rules.
+
+The class names and ids in use are collected from every discovered page
+(markup and inline scripts), from the header and footer partials, and
+from the string literals of src/js/*.js, which add classes at runtime.
+Names listed in purge_safelist.txt are always kept; it covers the classes
+Bootstrap's own JavaScript toggles (show, collapsing, modal-backdrop, ...)
+and accepts fnmatch patterns such as carousel-item-*.
+
+A rule is kept when, in at least one of its selectors, every class and id
+is in use; element, attribute and pseudo-class parts are not checked.
+@keyframes are kept only if a kept rule animates with them. The result is
+written next to the source as bootstrap.purged.min.css; --apply points the
+pages' links at it.
+"""
+import argparse
+import fnmatch
+import os
+import posixpath
+import re
+import sys
+
+from asset_fingerprints import strip_fingerprint
+from critical_css import parse_compound, parse_stylesheet, split_top_level, used_keyframes
+from site_pages import Page, discover_pages, load_config, write_atomic
+from template_registry import load_partials
+
+SOURCE = 'src/vendor/bootstrap/css/bootstrap.min.css'
+OUTPUT = 'src/vendor/bootstrap/css/bootstrap.purged.min.css'
+SAFELIST_NAME = 'purge_safelist.txt'
+
+# Scripts whose string literals may hold class names
+SCRIPT_DIR = 'src/js'
+
+CLASS_ATTRIBUTE_PATTERN = re.compile(r'\bclass\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+ID_ATTRIBUTE_PATTERN = re.compile(r'\bid\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+INLINE_SCRIPT_PATTERN = re.compile(r'<script\b[^>]*>(.*?)</script\s*>', re.DOTALL | re.IGNORECASE)
+STRING_PATTERN = re.compile(r'"((?:[^"\\\n]|\\.)*)"|\'((?:[^\'\\\n]|\\.)*)\'|`([^`]*)`')
+NAME_PATTERN = re.compile(r'-?[A-Za-z_][\w-]*')
+LINK_HREF_PATTERN = re.compile(r'(<link\b[^>]*\bhref=")([^"?#]+\.css)(")')
+
+
+def load_safelist(path):
+    """Return (names, patterns) from the safelist file; '#' starts a comment."""
+    names, patterns = set(), []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return names, patterns
+    for line in lines:
+        entry = line.split('#', 1)[0].strip()
+        if not entry:
+            continue
+        if any(char in entry for char in '*?['):
+            patterns.append(entry)
+        else:
+            names.add(entry)
+    return names, patterns
+
+
+def script_names(script):
+    """Every name-like token inside the string literals of a script."""
+    names = set()
+    for match in STRING_PATTERN.finditer(script):
+        literal = next(group for group in match.groups() if group is not None)
+        names.update(NAME_PATTERN.findall(literal))
+    return names
+
+
+def markup_names(content):
+    """Return (classes, ids, script names) used by a page or partial."""
+    classes, ids = set(), set()
+    for match in CLASS_ATTRIBUTE_PATTERN.finditer(content):
+        classes.update((match.group(1) or match.group(2) or '').split())
+    for match in ID_ATTRIBUTE_PATTERN.finditer(content):
+        value = (match.group(1) or match.group(2) or '').strip()
+        if value:
+            ids.add(value)
+    scripted = set()
+    for match in INLINE_SCRIPT_PATTERN.finditer(content):
+        scripted |= script_names(match.group(1))
+    return classes, ids, scripted
+
+
+class UsedNames:
+    """Class names and ids in use, plus the safelist patterns."""
+
+    def __init__(self, classes, ids, patterns):
+        self.classes = classes
+        self.ids = ids
+        self.patterns = patterns
+        self._matched = {}
+
+    def has_class(self, name):
+        if name in self.classes:
+            return True
+        matched = self._matched.get(name)
+        if matched is None:
+            matched = self._matched[name] = any(
+                fnmatch.fnmatchcase(name, pattern) for pattern in self.patterns
+            )
+        return matched
+
+    def selector_used(self, selector):
+        for compound in split_top_level(selector, ' \t\n>+~'):
+            if not compound:
+                continue
+            _, ids, classes, _ = parse_compound(compound)
+            if not ids <= self.ids or not all(self.has_class(name) for name in classes):
+                return False
+        return True
+
+
+def purge(nodes, used):
+    """Return the CSS text of the rules that are in use, and the rule counts."""
+    output = []
+    kept = total = 0
+    for kind, prelude, body in nodes:
+        if kind == 'rule':
+            total += 1
+            selectors = [
+                s.strip() for s in split_top_level(prelude, ',') if used.selector_used(s)
+            ]
+            if selectors:
+                kept += 1
+                output.append(f"{','.join(selectors)}{{{body}}}")
+        elif kind == 'group':
+            inner, inner_kept, inner_total = purge(body, used)
+            kept += inner_kept
+            total += inner_total
+            if inner:
+                output.append(f"{prelude}{{{inner}}}")
+        elif not prelude.split()[0].endswith('keyframes'):
+            # @font-face, @page and the like
+            output.append(body)
+    return ''.join(output), kept, total
+
+
+def link_purged(content, page_dir):
+    """Point the page's links to the source stylesheet at the purged copy.
+
+    Fingerprinted links are matched too; they get the plain name, to be
+    fingerprinted again by replace_header_footer.py --fingerprint.
+    """
+    output_name = posixpath.basename(OUTPUT)
+
+    def replace(match):
+        url = match.group(2)
+        path = strip_fingerprint(url)
+        if path.startswith('/'):
+            target = path.lstrip('/')
+        else:
+            target = posixpath.normpath(posixpath.join(page_dir, path))
+        if target != SOURCE:
+            return match.group(0)
+        return match.group(1) + posixpath.join(posixpath.dirname(url), output_name) + match.group(3)
+
+    return LINK_HREF_PATTERN.sub(replace, content)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        '--config',
+        help='site config listing the pages to scan (default: site_config.json)',
+    )
+    parser.add_argument(
+        '--apply',
+        action='store_true',
+        help=f'point the pages at {posixpath.basename(OUTPUT)} instead of '
+             f'{posixpath.basename(SOURCE)}',
+    )
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    base_dir = config['base_dir']
+
+    pages = discover_pages(config)
+    template_source = config['template_source']
+    rel_path = os.path.relpath(template_source, base_dir).replace(os.sep, '/')
+    if os.path.exists(template_source) and rel_path not in {page.rel_path for page in pages}:
+        stat = os.stat(template_source)
+        pages.append(Page(template_source, rel_path, stat.st_mtime_ns, stat.st_size))
+        pages.sort(key=lambda page: page.rel_path)
+
+    classes, ids = set(), set()
+    sources = list(load_partials(template_source).values())
+    for page in pages:
+        with open(page.path, 'r', encoding='utf-8') as f:
+            sources.append(f.read())
+    for content in sources:
+        page_classes, page_ids, scripted = markup_names(content)
+        classes |= page_classes | scripted
+        ids |= page_ids | scripted
+
+    script_dir = os.path.join(base_dir, *SCRIPT_DIR.split('/'))
+    for name in sorted(os.listdir(script_dir)):
+        if name.endswith('.js'):
+            with open(os.path.join(script_dir, name), 'r', encoding='utf-8') as f:
+                scripted = script_names(f.read())
+            classes |= scripted
+            ids |= scripted
+
+    safe_names, patterns = load_safelist(os.path.join(base_dir, SAFELIST_NAME))
+    used = UsedNames(classes | safe_names, ids | safe_names, patterns)
+
+    source_path = os.path.join(base_dir, *SOURCE.split('/'))
+    with open(source_path, 'r', encoding='utf-8') as f:
+        nodes = parse_stylesheet(f.read())
+    css, kept, total = purge(nodes, used)
+    css += ''.join(used_keyframes(nodes, css))
+
+    output_path = os.path.join(base_dir, *OUTPUT.split('/'))
+    try:
+        with open(output_path, 'r', encoding='utf-8') as f:
+            changed = f.read() != css
+    except OSError:
+        changed = True
+    if changed:
+        write_atomic(output_path, css)
+        print(f"✅ Wrote {OUTPUT}")
+
+    if args.apply:
+        for page in pages:
+            with open(page.path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            new_content = link_purged(content, posixpath.dirname(page.rel_path))
+            if new_content != content:
+                write_atomic(page.path, new_content)
+                print(f"✅ Linked: {page.rel_path}")
+
+    source_size = os.path.getsize(source_path)
+    output_size = len(css.encode('utf-8'))
+    print(f"\n✅ Kept {kept} of {total} rules ({len(classes)} classes, {len(ids)} ids in use): "
+          f"{source_size / 1024:.1f} KB -> {output_size / 1024:.1f} KB "
+          f"({100 - output_size * 100 / source_size:.0f}% smaller)")
+    if not kept:
+        print("❌ No rules kept, check the page discovery settings")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Render the card grids of the listing pages from the catalog.
+
+listings.json names, for each listing page, the grid element (by id or
+class), the partial its cards are rendered with and the catalog pages
+shown, in order:
+
+    {"pasta.html": {"grid": "dough--row", "card": "product-card",
+                    "items": [{"page": "product_pages/fettuccine.html",
+                               "image": ..., "hover_image": ...}, ...]}}
+
+With "per_page" set the grid only shows the first per_page items;
+paginate_recipes.py writes the pages with the rest.
+
+A card's title, link, image and recipe category come from catalog.json
+(see build_catalog.py, which is run first); any field set on the item
+overrides the catalog, for the card art that isn't on the detail page.
+Every card is written as an include of its partial keyed by the catalog
+page, so its parameters are resolved here at build time rather than
+shipped in the page:
+
+    <!-- partial: recipe-card recipe_details/x.html #1a2b3c4d -->
+
+The grid's contents - which cards it holds, in which order - belong to
+this script; replace_header_footer.py re-renders the cards in place when
+their partial changes, resolving their parameters the same way (see
+keyed_cards). Cards whose partial and parameters are unchanged (by the
+include's digest) are kept as they are in the page, only changed cards
+are rendered again, and pages without changes aren't written, so adding
+a product re-extracts one page and re-renders one card.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+
+from build_catalog import update_catalog
+from site_pages import load_config, write_atomic
+from split_languages import LANGUAGES, split_text
+from template_registry import (
+    FRAGMENT_INCLUDE_PATTERN, fragment_digest, load_fragments, splice_fragments,
+)
+
+LISTINGS_NAME = 'listings.json'
+
+DIV_TAG_PATTERN = re.compile(r'<div\b|</div\s*>')
+
+# An entry of a page's category filter list: its class name and label
+FILTER_PATTERN = re.compile(
+    r'<li\b(?=[^>]*\bdata-filter="\.([\w-]+)")[^>]*>(.*?)</li>', re.DOTALL
+)
+TAG_PATTERN = re.compile(r'<[^>]*>')
+
+# z-index of the first product card, lowered for each card after it, as on
+# the hand-written pages
+Z_INDEX_START = 90
+Z_INDEX_STEP = 5
+
+# Offset of a product's hover image, as .product-image.secondary in main.css
+HOVER_TOP = '25%'
+
+# Language of a card image's default alt text
+ALT_LANGUAGE = 'en'
+
+
+def product_card(entry, item, position, categories):
+    image = item.get('image', entry['image'])
+    return {
+        'href': entry['url'],
+        'z_index': max(0, Z_INDEX_START - Z_INDEX_STEP * position),
+        'image': image,
+        'hover_image': item.get('hover_image', image),
+        'hover_top': item.get('hover_top', HOVER_TOP),
+        'title': item.get('title', entry['title']),
+    }
+
+
+def alt_text(title):
+    index = next(i for i, lang in enumerate(LANGUAGES) if lang.code == ALT_LANGUAGE)
+    return split_text(title, index) or title
+
+
+def recipe_tile(entry, item, position, categories):
+    title = item.get('title', entry['title'])
+    return {
+        'href': entry['url'],
+        'image': item.get('image', entry['image']),
+        'alt': item.get('alt', alt_text(title)),
+        'title': title,
+    }
+
+
+def recipe_card(entry, item, position, categories):
+    label = item.get('category_label', entry['category'])
+    category = item.get('category') or categories.get(label)
+    if not category:
+        raise ValueError(f"category '{label}' is not in the filter list")
+    return {
+        'category': category,
+        **recipe_tile(entry, item, position, categories),
+        'category_label': label,
+    }
+
+
+# Parameters of each card partial, from the catalog entry and listing item
+CARDS = {
+    'product-card': product_card,
+    'recipe-card': recipe_card,
+    'recipe-tile': recipe_tile,
+}
+
+
+def find_grid(content, name):
+    """Return (tag start, body start, body end) of the div with the given id or class."""
+    opening = re.compile(
+        rf'<div\b[^>]*\b(?:id="{re.escape(name)}"|class="(?:[^"]*\s)?{re.escape(name)}(?:\s[^"]*)?")[^>]*>'
+    )
+    match = opening.search(content)
+    if not match:
+        raise ValueError(f"no grid '{name}'")
+    depth = 1
+    for tag in DIV_TAG_PATTERN.finditer(content, match.end()):
+        depth += -1 if tag.group(0).startswith('</') else 1
+        if depth == 0:
+            return match.start(), match.end(), tag.start()
+    raise ValueError(f"unterminated grid '{name}'")
+
+
+def load_listings(base_dir):
+    with open(os.path.join(base_dir, LISTINGS_NAME), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def filter_list(content):
+    """Return [(class name, label)] of the category filters in content."""
+    return [
+        (match.group(1), ' '.join(TAG_PATTERN.sub('', match.group(2)).split()))
+        for match in FILTER_PATTERN.finditer(content)
+    ]
+
+
+def grid_cards(content, start, listing, catalog):
+    """Return [(key, params)] of the listing's cards, for a grid starting at start."""
+    categories = {}
+    for name, label in filter_list(content[:start]):
+        categories.setdefault(label, name)
+
+    cards = []
+    for position, item in enumerate(listing['items']):
+        entry = catalog['pages'].get(item['page'])
+        if entry is None:
+            raise ValueError(f"{item['page']} is not in the catalog")
+        try:
+            params = CARDS[listing['card']](entry, item, position, categories)
+        except ValueError as e:
+            raise ValueError(f"{item['page']}: {e}") from e
+        if any(value is None for value in params.values()):
+            missing = ', '.join(key for key, value in params.items() if value is None)
+            raise ValueError(f"{item['page']}: no {missing}; set it in {LISTINGS_NAME}")
+        cards.append((item['page'], params))
+    return cards
+
+
+def keyed_cards(content, listing, catalog):
+    """Return the parameters of a listing page's cards, as splice_fragments takes them."""
+    _, start, _ = find_grid(content, listing['grid'])
+    return {
+        (listing['card'], key): params
+        for key, params in grid_cards(content, start, listing, catalog)
+    }
+
+
+def render_include(name, key, params, indent, fragments):
+    include = f'{indent}<!-- partial: {name} {key} --><!-- /partial: {name} -->'
+    return splice_fragments(include, fragments, {(name, key): params})[0]
+
+
+def render_grid(content, listing, catalog, fragments):
+    """Return (content, number of cards rendered) with the grid brought up to date."""
+    tag_start, start, end = find_grid(content, listing['grid'])
+    indent = content[content.rfind('\n', 0, tag_start) + 1:tag_start] + '  '
+    closing_start = content.rfind('\n', start, end) + 1
+    if not closing_start or content[closing_start:end].strip():
+        closing_start = end
+    body = content[start:closing_start]
+
+    existing = {}
+    for match in FRAGMENT_INCLUDE_PATTERN.finditer(body):
+        if match.group('key') and match.group('digest'):
+            include = (match.group('name'), match.group('key'), match.group('digest'))
+            existing[include] = match.group(0)
+    only_includes = not FRAGMENT_INCLUDE_PATTERN.sub('', body).strip()
+
+    card = listing['card']
+    if card not in fragments:
+        raise ValueError(f"Unknown partial '{card}'")
+    includes = []
+    blocks = []
+    rendered = 0
+    for key, params in grid_cards(content, start, listing, catalog)[:listing.get('per_page')]:
+        includes.append((card, key, fragment_digest(fragments[card][1], params)))
+        block = existing.get(includes[-1])
+        if block is None:
+            block = render_include(card, key, params, indent, fragments)
+            rendered += 1
+        blocks.append(block)
+
+    # The same cards in the same order, however the page was formatted since
+    if only_includes and includes == list(existing):
+        return content, 0
+    new_body = '\n' + ''.join(f'{block}\n' for block in blocks)
+    return content[:start] + new_body + content[closing_start:], rendered
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        '--config',
+        help='site config locating the pages (default: site_config.json)',
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=1,
+        help='worker processes for extracting changed pages (0 = one per CPU core, default: 1)',
+    )
+    parser.add_argument(
+        '--check',
+        action='store_true',
+        help='only report whether the listing pages are up to date',
+    )
+    args = parser.parse_args()
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+
+    config = load_config(args.config)
+    base_dir = config['base_dir']
+    listings = load_listings(base_dir)
+    for rel_path, listing in listings.items():
+        if listing['card'] not in CARDS:
+            print(f"❌ Unknown card '{listing['card']}' for {rel_path}")
+            sys.exit(1)
+
+    catalog, changed = update_catalog(config, jobs)
+    if changed:
+        print()
+    fragments = load_fragments(config['partials_dir'])
+
+    outdated = []
+    errors = 0
+    for rel_path, listing in listings.items():
+        path = os.path.join(base_dir, *rel_path.split('/'))
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            new_content, rendered = render_grid(content, listing, catalog, fragments)
+        except (OSError, ValueError) as e:
+            print(f"❌ {rel_path}: {e}")
+            errors += 1
+            continue
+        if new_content == content:
+            print(f"➖ {rel_path} is up to date")
+            continue
+        outdated.append(rel_path)
+        if args.check:
+            print(f"❌ {rel_path} differs from the catalog")
+            continue
+        write_atomic(path, new_content)
+        print(f"✅ Rendered {rendered} of {len(listing['items'])} cards in {rel_path}")
+
+    if errors or (args.check and outdated):
+        sys.exit(1)
+    if outdated and not args.check:
+        print(f"\n✅ Updated {len(outdated)} of {len(listings)} listing pages")
+
+
+if __name__ == '__main__':
+    main()
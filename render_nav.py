@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Render the site header from nav.json into the template source.
+
+nav.json holds the navigation once: the brand logo, the languages of the
+switcher and the entries, each either a link or a dropdown of links, with
+".."-separated labels in the four languages. It is rendered into both
+variants of the <header> - the offcanvas menu for mobile screens and the
+desktop nav bar, which differ only in their classes - and replaces the
+header of the template source (contact.html). replace_header_footer.py or
+replace_headers.py then copy it to the pages as before.
+
+Icons are <use> references into the shared sprite assets/images/icons.svg
+rather than inline SVG.
+
+The attributes later stages add to the logo - width/height and the
+placeholder from image_dimensions.py, srcset/sizes from
+responsive_images.py - are kept: a logo <img> that only differs from the
+rendered one by them is left as it is in the template source.
+"""
+import argparse
+import html
+import json
+import os
+import re
+import sys
+
+from image_dimensions import LQIP_STYLE_PATTERN, STYLE_PATTERN
+from responsive_images import IMG_TAG_PATTERN
+from site_pages import load_config, write_atomic
+from template_registry import PARTIAL_PATTERNS
+
+NAV_NAME = 'nav.json'
+
+SPRITE_URL = '/assets/images/icons.svg'
+
+# Tags are broken into one attribute per line past this width, as prettier does
+LINE_WIDTH = 80
+
+# What sets the two header variants apart
+VARIANTS = {
+    'mobile': {
+        'language_dropdown': 'dropdown d-flex justify-content-center',
+        'language_button_id': 'languageDropdownOffcanvas',
+        'language_menu': 'dropdown-menu Header-nav-folder px-5',
+        'language_option': 'dropdown-item language-option p-2',
+        'flag_style': 'transform: scale(1.3); margin-left: 5px; text-transform: none',
+        'offset': '0,10',
+        'dropdown': 'dropdown mt-5',
+        'dropdown_button_style': 'color: #212529',
+        'dropdown_menu': 'dropdown-menu Header-nav-folder w-100 px-2',
+        'dropdown_item': 'dropdown-item multilingual-text p-2',
+        'link': 'header-nav--a-link mt-5',
+    },
+    'desktop': {
+        'language_dropdown': 'dropdown',
+        'language_button_id': 'languageDropdown',
+        'language_menu': 'dropdown-menu Header-nav-folder',
+        'language_option': 'language-option',
+        'flag_style': 'text-transform: none',
+        'offset': '-12,8',
+        'dropdown': 'dropdown',
+        'dropdown_button_style': None,
+        'dropdown_menu': 'dropdown-menu Header-nav-folder',
+        'dropdown_item': 'Header-nav-folder-item multilingual-text',
+        'link': 'header-nav--a-link',
+    },
+}
+
+# <img> attributes added by image_dimensions.py and responsive_images.py
+STAGE_ATTRIBUTE_PATTERN = re.compile(r'\s+(?:width|height|srcset|sizes)\s*=\s*(?:"[^"]*"|\'[^\']*\')')
+
+DROPDOWN_BUTTON = 'btn btn-primary dropdown-toggle multilingual-text no-outline-btn Header-nav-item'
+
+
+def format_attrs(attrs):
+    return [
+        name if value is True else f'{name}="{html.escape(value)}"'
+        for name, value in attrs.items() if value is not None and value is not False
+    ]
+
+
+def start_tag(indent, name, attrs, close='>'):
+    """Lines of a start tag, one attribute per line if it doesn't fit."""
+    parts = format_attrs(attrs)
+    line = f'{indent}<{" ".join([name] + parts)}{close}'
+    if len(line) <= LINE_WIDTH or not parts:
+        return [line]
+    lines = [f'{indent}<{name}'] + [f'{indent}  {part}' for part in parts]
+    return lines + [f'{indent}{close.lstrip()}']
+
+
+def text_element(indent, name, attrs, text):
+    """Lines of an element holding only (escaped) text."""
+    text = html.escape(text, quote=False)
+    single = start_tag(indent, name, attrs)
+    if len(single) == 1 and len(f'{single[0]}{text}</{name}>') <= LINE_WIDTH:
+        return [f'{single[0]}{text}</{name}>']
+    return start_tag(indent, name, attrs) + [f'{indent}  {text}', f'{indent}</{name}>']
+
+
+def element(indent, name, attrs, children):
+    """Lines of an element whose children are rendered by the given callables."""
+    lines = start_tag(indent, name, attrs)
+    for child in children:
+        lines.extend(child(indent + '  '))
+    lines.append(f'{indent}</{name}>')
+    return lines
+
+
+def comment(text):
+    return lambda indent: [f'{indent}<!-- {text} -->']
+
+
+def logo(brand, style='display: block'):
+    return lambda indent: start_tag(indent, 'img', {
+        'src': brand['logo'],
+        'alt': brand['alt'],
+        'class': 'img-fluid',
+        'style': style,
+        'loading': 'lazy',
+        'decoding': 'async',
+    }, close=' />')
+
+
+def branding(brand):
+    return lambda indent: element(indent, 'div', {'class': 'Header-branding'}, [
+        lambda indent: element(indent, 'a', {'href': brand['href']}, [logo(brand)]),
+    ])
+
+
+def icon(name, width, height):
+    return lambda indent: element(indent, 'svg', {
+        'width': str(width), 'height': str(height), 'class': 'icon', 'aria-hidden': 'true',
+    }, [lambda indent: [f'{indent}<use href="{SPRITE_URL}#{name}"></use>']])
+
+
+def marker(language):
+    """A language's flag; a plain-text marker is kept from being upper-cased."""
+    text = html.escape(language['marker'])
+    if text.isascii():
+        return f'<span style="text-transform: none">{text}</span>'
+    return text
+
+
+def language_switcher(nav, variant):
+    languages = nav['languages']
+    button_id = variant['language_button_id']
+
+    def option(index, language):
+        return lambda indent: element(indent, 'li', {}, [
+            lambda indent: start_tag(indent, 'a', {
+                'class': variant['language_option'],
+                'href': 'javascript:void(0)',
+                'data-lang': str(index),
+            }) + [f'{indent}  {marker(language)} {html.escape(language["label"])}</a>'],
+        ])
+
+    button = lambda indent: element(indent, 'button', {
+        'class': 'btn dropdown-toggle language-btn no-outline-btn',
+        'type': 'button',
+        'id': button_id,
+        'data-bs-toggle': 'dropdown',
+        'data-bs-offset': variant['offset'],
+        'aria-expanded': 'false',
+    }, [lambda indent: start_tag(indent, 'span', {
+        'class': 'current-language-flag', 'style': variant['flag_style'],
+    }) + [f'{indent}  {html.escape(languages[0]["marker"])}</span>']])
+
+    menu = lambda indent: element(indent, 'ul', {
+        'class': variant['language_menu'], 'aria-labelledby': button_id,
+    }, [option(index, language) for index, language in enumerate(languages)])
+
+    return [
+        comment('Language Switcher Dropdown'),
+        lambda indent: element(indent, 'div', {'class': 'language-switcher'}, [
+            lambda indent: element(indent, 'div', {'class': variant['language_dropdown']},
+                                   [button, menu]),
+        ]),
+    ]
+
+
+def nav_entry(entry, variant):
+    if 'items' not in entry:
+        return lambda indent: element(indent, 'div', {'class': variant['link']}, [
+            lambda indent: text_element(indent, 'a', {
+                'href': entry['href'],
+                'class': 'Header-nav-item multilingual-text',
+                **entry.get('attributes', {}),
+            }, entry['label']),
+        ])
+
+    items = [
+        lambda indent, item=item: element(indent, 'li', {}, [
+            lambda indent: text_element(indent, 'a', {
+                'href': item['href'],
+                'class': variant['dropdown_item'],
+                **item.get('attributes', {}),
+            }, item['label']),
+        ])
+        for item in entry['items']
+    ]
+    return lambda indent: element(indent, 'div', {'class': variant['dropdown']}, [
+        lambda indent: text_element(indent, 'button', {
+            'class': DROPDOWN_BUTTON,
+            'type': 'button',
+            'data-bs-offset': variant['offset'],
+            'data-bs-toggle': 'dropdown',
+            'style': variant['dropdown_button_style'],
+            **entry.get('attributes', {}),
+        }, entry['label']),
+        lambda indent: element(indent, 'ul', {'class': variant['dropdown_menu']}, items),
+    ])
+
+
+def render_header(nav, indent):
+    """Return the <header> element, its first line without indentation."""
+    brand = nav['brand']
+    mobile = VARIANTS['mobile']
+    desktop = VARIANTS['desktop']
+
+    offcanvas = lambda indent: element(indent, 'div', {
+        'class': 'offcanvas offcanvas-start Header-nav--offcanvas',
+        'tabindex': '-1',
+        'id': 'offcanvasMain',
+        'aria-labelledby': 'offcanvasMainLabel',
+    }, [
+        lambda indent: element(indent, 'div', {
+            'class': 'offcanvas-header d-flex flex-direction-row justify-content-between '
+                     'align-items-center pt-4',
+        }, [
+            lambda indent: element(indent, 'h5', {
+                'class': 'offcanvas-title', 'id': 'offcanvasMainLabel',
+            }, [logo(brand, 'display: block; width: 50px')]),
+            lambda indent: start_tag(indent, 'button', {
+                'type': 'button',
+                'class': 'btn-close',
+                'data-bs-dismiss': 'offcanvas',
+                'aria-label': 'Close',
+            }, close='></button>'),
+        ]),
+        lambda indent: element(indent, 'div', {'class': 'offcanvas-body py-2 px-4'}, (
+            language_switcher(nav, mobile) + [nav_entry(entry, mobile) for entry in nav['entries']]
+        )),
+    ])
+
+    mobile_header = lambda indent: element(indent, 'div', {
+        'class': 'Header-inner w-100 d-md-none d-flex flex-row justify-content-between '
+                 'align-items-center flex-grow-0 flex-shrink-0 pb-2',
+    }, [
+        branding(brand),
+        lambda indent: element(indent, 'div', {'class': 'icon-bars'}, [
+            lambda indent: element(indent, 'button', {
+                'class': 'btn btn-primary',
+                'type': 'button',
+                'data-bs-toggle': 'offcanvas',
+                'data-bs-target': '#offcanvasMain',
+                'aria-controls': 'offcanvasMain',
+            }, [icon('icon-menu', 24, 14)]),
+        ]),
+        comment('OFFCANVAS SECTION'),
+        offcanvas,
+    ])
+
+    desktop_header = lambda indent: element(indent, 'div', {
+        'class': 'Header-inner d-none d-md-flex flex-column align-items-center '
+                 'flex-grow-0 flex-shrink-0',
+    }, [
+        branding(brand),
+        comment('Navigation bar'),
+        lambda indent: element(indent, 'nav', {
+            'class': 'Header-nav d-none d-md-block Header-nav--primary',
+        }, [
+            lambda indent: element(indent, 'div', {
+                'class': 'Header-nav-inner d-flex flex-row gap-3 align-items-center',
+            }, language_switcher(nav, desktop) + [
+                nav_entry(entry, desktop) for entry in nav['entries']
+            ]),
+        ]),
+    ])
+
+    lines = element(indent, 'header', {
+        'class': 'w-100 d-flex flex-row justify-content-center position-sticky top-0 start-0',
+    }, [
+        comment('Header for mobile screens and tablets with offcanvas'),
+        mobile_header,
+        lambda indent: [''],
+        comment('Header for desktop screens'),
+        desktop_header,
+    ])
+    return '\n'.join(line if line.strip() else '' for line in lines)[len(indent):]
+
+
+def base_tag(tag):
+    """An <img> tag without the attributes later build stages add to it."""
+    tag = STAGE_ATTRIBUTE_PATTERN.sub('', tag)
+    style = STYLE_PATTERN.search(tag)
+    if not style:
+        return tag
+    value = style.group(1) if style.group(1) is not None else style.group(2)
+    value = LQIP_STYLE_PATTERN.sub('', value).strip().rstrip(';')
+    return f'{tag[:style.start()]} style="{value}"{tag[style.end():]}'
+
+
+def keep_stage_attributes(header, previous):
+    """Keep the previous header's <img> tags where only later stages changed them."""
+    previous_tags = iter(IMG_TAG_PATTERN.findall(previous))
+
+    def replace(match):
+        old = next(previous_tags, None)
+        if old is not None and base_tag(old) == base_tag(match.group(0)):
+            return old
+        return match.group(0)
+
+    return IMG_TAG_PATTERN.sub(replace, header)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        '--config',
+        help='site config locating the template source (default: site_config.json)',
+    )
+    parser.add_argument(
+        '--check',
+        action='store_true',
+        help='only report whether the template source header is up to date',
+    )
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    template_source = config['template_source']
+    with open(os.path.join(config['base_dir'], NAV_NAME), 'r', encoding='utf-8') as f:
+        nav = json.load(f)
+    with open(template_source, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    match = PARTIAL_PATTERNS['header'].search(content)
+    if not match:
+        print(f"❌ No header found in {template_source}")
+        sys.exit(1)
+    line_start = content.rfind('\n', 0, match.start()) + 1
+    indent = content[line_start:match.start()]
+    header = keep_stage_attributes(render_header(nav, indent), match.group(0))
+    new_content = content[:match.start()] + header + content[match.end():]
+
+    rel_path = os.path.relpath(template_source, config['base_dir'])
+    if new_content == content:
+        print(f"➖ Header of {rel_path} is up to date")
+        return
+    if args.check:
+        print(f"❌ Header of {rel_path} differs from {NAV_NAME}")
+        sys.exit(1)
+    write_atomic(template_source, new_content)
+    print(f"✅ Rendered the header into {rel_path} "
+          f"({len(match.group(0))} -> {len(header)} characters); "
+          "run replace_header_footer.py to update the pages")
+
+
+if __name__ == '__main__':
+    main()
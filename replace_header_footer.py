@@ -2,556 +2,607 @@
 """
 Script to replace <header> and <footer> elements in HTML files
 with the versions from contact.html
+
+Pages can also include the named fragments in partials/ (see
+template_registry.py), which are re-rendered in the same pass when the
+fragment or the include's parameters changed. The listing cards, keyed
+includes whose parameters come from listings.json and catalog.json, are
+re-rendered the same way (see render_listings.py, which owns which cards
+a grid holds). The manifest records which partials each page includes,
+cards too, so a changed partial only re-processes the pages that include
+it.
+
+With --fingerprint the CSS/JS assets are also given content-hash names
+and the pages' <link>/<script> references are rewritten in the same pass.
+With --minify pages are written with insignificant whitespace and comments
+removed (see html_minify.py).
 """
-import re
+import argparse
+import difflib
+import hashlib
+import json
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from asset_fingerprints import build_assets, manifest_hash, rewrite_asset_refs
+from build_catalog import update_catalog
+from html_minify import minify_html
+from render_listings import LISTINGS_NAME, keyed_cards, load_listings
+from site_pages import discover_pages, load_config
+from template_registry import (
+    ELEMENT_OPEN_PATTERN,
+    load_fragments,
+    load_partials,
+    partial_hashes,
+    partials_hash,
+    splice_fragments,
+)
+
+# Manifest of processed pages, stored in the site root between runs
+MANIFEST_NAME = '.header_footer_manifest.json'
+
+
+def page_fingerprint(file_path):
+    """Return the manifest entry (stat and content hash) for a page."""
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    stat = os.stat(file_path)
+    return {
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'sha256': hashlib.sha256(data).hexdigest(),
+    }
+
+
+def load_manifest(manifest_path):
+    """Load the manifest from a previous run, or return an empty one."""
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if isinstance(manifest.get('pages'), dict):
+            return manifest
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {'templates': None, 'partials': None, 'pages': {}}
+
+
+def save_manifest(manifest_path, manifest):
+    """Write the manifest atomically so an interrupted run can't corrupt it."""
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def needs_processing(page, entry):
+    """Check a discovered page against its manifest entry.
+
+    Returns (needed, fingerprint). The stat taken during discovery is
+    compared first so an untouched page is never read; a touched page whose
+    content hash still matches only refreshes its entry.
+    """
+    if entry:
+        if (entry.get('mtime_ns'), entry.get('size')) == (page.mtime_ns, page.size):
+            return False, entry
+    fingerprint = page_fingerprint(page.path)
+    if entry and entry.get('sha256') == fingerprint['sha256']:
+        return False, fingerprint
+    return True, fingerprint
+
+
+def find_elements(content):
+    """Yield (start, end, name) for each <header>/<footer> element in order.
+
+    Matches the same spans as `<header\b[^>]*>.*?</header>` and its footer
+    counterpart, but both elements are found in one scan of the document.
+    """
+    pos = 0
+    while True:
+        match = ELEMENT_OPEN_PATTERN.search(content, pos)
+        if not match:
+            return
+        name = match.group(1)
+        close_tag = f'</{name}>'
+        close = content.find(close_tag, match.end())
+        if close == -1:
+            # Unterminated element - keep scanning like re.sub would
+            pos = match.start() + 1
+            continue
+        end = close + len(close_tag)
+        yield match.start(), end, name
+        pos = end
+
 
-# Template header and footer from contact.html
-TEMPLATE_HEADER = '''<header
-          class="w-100 d-flex flex-row justify-content-center position-sticky top-0 start-0"
-        >
-          <!-- Header for mobile screens and tablets with offcanvas -->
-          <div
-            class="Header-inner w-100 d-md-none d-flex flex-row justify-content-between align-items-center flex-grow-0 flex-shrink-0 pb-2"
-          >
-            <div class="Header-branding">
-              <a href="/">
-                <img
-                  src="../assets/images/logo_png_black@2x.png"
-                  alt="Kulinarium Meister"
-                  class="img-fluid"
-                  style="display: block"
-                  loading="lazy"
-                  decoding="async"
-                />
-              </a>
-            </div>
-            <div class="icon-bars">
-              <button
-                class="btn btn-primary"
-                type="button"
-                data-bs-toggle="offcanvas"
-                data-bs-target="#offcanvasMain"
-                aria-controls="offcanvasMain"
-              >
-                <svg
-                  width="24"
-                  height="14"
-                  viewBox="0 0 24 14"
-                  class="icon"
-                  xmlns="http://www.w3.org/2000/svg"
-                >
-                  <line
-                    x1="0"
-                    y1="3"
-                    x2="24"
-                    y2="3"
-                    stroke="currentColor"
-                    stroke-width="1"
-                  />
-                  <line
-                    x1="0"
-                    y1="11"
-                    x2="24"
-                    y2="11"
-                    stroke="currentColor"
-                    stroke-width="1"
-                  />
-                </svg>
-              </button>
-            </div>
-            <!-- OFFCANVAS SECTION -->
-            <div
-              class="offcanvas offcanvas-start Header-nav--offcanvas"
-              tabindex="-1"
-              id="offcanvasMain"
-              aria-labelledby="offcanvasMainLabel"
-            >
-              <div
-                class="offcanvas-header d-flex flex-direction-row justify-content-between align-items-center pt-4"
-              >
-                <h5 class="offcanvas-title" id="offcanvasMainLabel">
-                  <img
-                    src="../assets/images/logo_png_black@2x.png"
-                    alt="Kulinarium Meister"
-                    class="img-fluid"
-                    style="display: block; width: 50px"
-                    loading="lazy"
-                    decoding="async"
-                  />
-                </h5>
-                <button
-                  type="button"
-                  class="btn-close"
-                  data-bs-dismiss="offcanvas"
-                  aria-label="Close"
-                ></button>
-              </div>
-              <div class="offcanvas-body p-4">
-                <!-- Language Switcher Dropdown -->
-                <div class="language-switcher">
-                  <div class="dropdown">
-                    <button
-                      class="btn dropdown-toggle language-btn no-outline-btn"
-                      type="button"
-                      id="languageDropdownOffcanvas"
-                      data-bs-toggle="dropdown"
-                      data-bs-offset="0,10"
-                      aria-expanded="false"
-                    >
-                      <span
-                        class="current-language-flag"
-                        style="
-                          transform: scale(1.3);
-                          margin-left: 5px;
-                          text-transform: none;
-                        "
-                      >
-                        🇺🇦</span
-                      >
-                    </button>
-                    <ul
-                      class="dropdown-menu Header-nav-folder w-100 px-5"
-                      aria-labelledby="languageDropdownOffcanvas"
-                    >
-                      <li>
-                        <a
-                          class="dropdown-item language-option p-2"
-                          href="javascript:void(0)"
-                          data-lang="0"
-                          >🇺🇦 Українська</a
-                        >
-                      </li>
-                      <li>
-                        <a
-                          class="dropdown-item language-option p-2"
-                          href="javascript:void(0)"
-                          data-lang="1"
-                          >🇬🇧 English</a
-                        >
-                      </li>
-                      <li>
-                        <a
-                          class="dropdown-item language-option p-2"
-                          href="javascript:void(0)"
-                          data-lang="2"
-                          >🇵🇱 Polski</a
-                        >
-                      </li>
-                      <li>
-                        <a
-                          class="dropdown-item language-option p-2"
-                          href="javascript:void(0)"
-                          data-lang="3"
-                        >
-                          <span style="text-transform: none">Ru</span>
-                          Русский</a
-                        >
-                      </li>
-                    </ul>
-                  </div>
-                </div>
-                <!-- Menu Items -->
-                <div class="header-nav--a-link">
-                  <a
-                    href="/"
-                    class="Header-nav-item multilingual-text"
-                    data-test="template-nav"
-                    >Головна..Home..Start..Главная</a
-                  >
-                </div>
-                <!-- DOUGH DROPDOWN -->
-                <div class="dropdown">
-                  <button
-                    class="btn btn-primary dropdown-toggle multilingual-text no-outline-btn Header-nav-item"
-                    type="button"
-                    data-bs-offset="0,10"
-                    data-bs-toggle="dropdown"
-                  >
-                    Тісто..Dough..Ciasto..Тесто
-                  </button>
-                  <ul class="dropdown-menu Header-nav-folder w-100 px-5">
-                    <li>
-                      <a
-                        href="/dough-for-baking.html"
-                        class="Header-nav-folder-item multilingual-text"
-                        >Тiсто для випічки..Dough for baking..Ciasto do
-                        Pieczenia..Тесто для выпечки</a
-                      >
-                    </li>
-                    <li>
-                      <a
-                        href="/ready-to-cook.html"
-                        class="Header-nav-folder-item multilingual-text"
-                        >Тісто з начинкою..Stuffed Dough..Сiasto z
-                        nadzieniem..Тесто с начинкой</a
-                      >
-                    </li>
-                    <li>
-                      <a
-                        href="/tisto-dlya-pelmeniv.html"
-                        class="Header-nav-folder-item multilingual-text"
-                        >Кружечки для пельменiв..Dumpling Wrappers..Ciasto na
-                        uszka..Кружочки для пельменей</a
-                      >
-                    </li>
-                  </ul>
-                </div>
-                <div class="header-nav--a-link">
-                  <a
-                    href="/pasta.html"
-                    class="Header-nav-item multilingual-text"
-                    >Паста..Pasta..Makaron..Паста</a
-                  >
-                </div>
-                <div class="header-nav--a-link">
-                  <a
-                    href="/ravioli.html"
-                    class="Header-nav-item multilingual-text"
-                    >Равiолi..Ravioli..Ravioli..Равиоли</a
-                  >
-                </div>
-                <div class="header-nav--a-link">
-                  <a
-                    href="/frozen.html"
-                    class="Header-nav-item multilingual-text"
-                    >Заморожені..Frozen Range..Mrożone..Замороженные</a
-                  >
-                </div>
-                <div class="header-nav--a-link">
-                  <a
-                    href="/recipes.html"
-                    class="Header-nav-item multilingual-text"
-                    >Відео-рецепти..Video Recipes..Przepisy..Видео-рецепты</a
-                  >
-                </div>
-                <div class="header-nav--a-link">
-                  <a
-                    href="/faq.html"
-                    class="Header-nav-item multilingual-text"
-                    data-test="template-nav"
-                    >Питання Вiдповiдi..FAQ..Pytania Odpowiedzi..Вопросы
-                    Ответы</a
-                  >
-                </div>
-                <div class="header-nav--a-link">
-                  <a
-                    href="/contact.html"
-                    class="Header-nav-item multilingual-text"
-                    data-test="template-nav"
-                    >Контакти..Contacts..Kontakty..Контакты</a
-                  >
-                </div>
-              </div>
-            </div>
-          </div>
-          <!-- Header for desktops (hidden on mobile and tablets) -->
-          <div
-            class="Header-inner w-100 d-none d-md-flex flex-row gap-3 justify-content-start align-items-center flex-grow-0 flex-shrink-0"
-          >
-            <div class="Header-branding">
-              <a href="/">
-                <img
-                  src="../assets/images/logo_png_black@2x.png"
-                  alt="Kulinarium Meister"
-                  class="img-fluid"
-                  style="display: block"
-                  loading="lazy"
-                  decoding="async"
-                />
-              </a>
-            </div>
-            <nav
-              class="Header-nav d-flex flex-row gap-3 justify-content-start align-items-end ps-2"
-              data-content-field="navigation"
-            >
-              <div class="header-nav--a-link">
-                <a
-                  href="/"
-                  class="Header-nav-item multilingual-text"
-                  data-test="template-nav"
-                  >Головна..Home..Start..Главная</a
-                >
-              </div>
-              <div class="dropdown desktop">
-                <button
-                  class="btn dropdown-toggle multilingual-text no-outline-btn Header-nav-item"
-                  type="button"
-                  id="languageDropdown"
-                  data-bs-toggle="dropdown"
-                  data-bs-offset="-12,8"
-                  aria-expanded="false"
-                >
-                  <span class="label multilingual-text"
-                    >Мова..Language..Język..Язык</span
-                  >
-                  <span
-                    class="current-language-flag"
-                    style="text-transform: none"
-                    >🇺🇦</span
-                  >
-                </button>
-                <ul
-                  class="dropdown-menu Header-nav-folder"
-                  aria-labelledby="languageDropdown"
-                >
-                  <li>
-                    <a
-                      class="language-option"
-                      href="javascript:void(0)"
-                      data-lang="0"
-                      >🇺🇦 Українська</a
-                    >
-                  </li>
-                  <li>
-                    <a
-                      class="language-option"
-                      href="javascript:void(0)"
-                      data-lang="1"
-                      >🇬🇧 English</a
-                    >
-                  </li>
-                  <li>
-                    <a
-                      class="language-option"
-                      href="javascript:void(0)"
-                      data-lang="2"
-                      >🇵🇱 Polski</a
-                    >
-                  </li>
-                  <li>
-                    <a
-                      class="language-option"
-                      href="javascript:void(0)"
-                      data-lang="3"
-                    >
-                      <span style="text-transform: none">Ru</span>
-                      Русский</a
-                    >
-                  </li>
-                </ul>
-              </div>
-              <!-- DOUGH DROPDOWN -->
-              <div class="dropdown">
-                <button
-                  class="btn btn-primary dropdown-toggle multilingual-text no-outline-btn Header-nav-item"
-                  type="button"
-                  data-bs-offset="-12,8"
-                  data-bs-toggle="dropdown"
-                >
-                  Тісто..Dough..Ciasto..Тесто
-                </button>
-                <ul class="dropdown-menu Header-nav-folder">
-                  <li>
-                    <a
-                      href="/dough-for-baking.html"
-                      class="Header-nav-folder-item multilingual-text"
-                      >Тiсто для випічки..Dough for baking..Ciasto do
-                      Pieczenia..Тесто для выпечки</a
-                    >
-                  </li>
-                  <li>
-                    <a
-                      href="/ready-to-cook.html"
-                      class="Header-nav-folder-item multilingual-text"
-                      >Тісто з начинкою..Stuffed Dough..Сiasto z
-                      nadzieniem..Тесто с начинкой</a
-                    >
-                  </li>
-                  <li>
-                    <a
-                      href="/tisto-dlya-pelmeniv.html"
-                      class="Header-nav-folder-item multilingual-text"
-                      >Кружечки для пельменiв..Dumpling Wrappers..Ciasto na
-                      uszka..Кружочки для пельменей</a
-                    >
-                  </li>
-                </ul>
-              </div>
-              <div class="header-nav--a-link">
-                <a
-                  href="/pasta.html"
-                  class="Header-nav-item multilingual-text"
-                  >Паста..Pasta..Makaron..Паста</a
-                >
-              </div>
-              <div class="header-nav--a-link">
-                <a
-                  href="/ravioli.html"
-                  class="Header-nav-item multilingual-text"
-                  >Равiолi..Ravioli..Ravioli..Равиоли</a
-                >
-              </div>
-              <div class="header-nav--a-link">
-                <a
-                  href="/frozen.html"
-                  class="Header-nav-item multilingual-text"
-                  >Заморожені..Frozen Range..Mrożone..Замороженные</a
-                >
-              </div>
-              <div class="header-nav--a-link">
-                <a
-                  href="/recipes.html"
-                  class="Header-nav-item multilingual-text"
-                  >Відео-рецепти..Video Recipes..Przepisy..Видео-рецепты</a
-                >
-              </div>
-              <div class="header-nav--a-link">
-                <a
-                  href="/faq.html"
-                  class="Header-nav-item multilingual-text"
-                  data-test="template-nav"
-                  >Питання Вiдповiдi..FAQ..Pytania Odpowiedzi..Вопросы
-                  Ответы</a
-                >
-              </div>
-              <div class="header-nav--a-link">
-                <a
-                  href="/contact.html"
-                  class="Header-nav-item multilingual-text"
-                  data-test="template-nav"
-                  >Контакти..Contacts..Kontakty..Контакты</a
-                >
-              </div>
-            </nav>
-          </div>
-        </header>'''
-
-TEMPLATE_FOOTER = '''<footer id="footer-index">
-        <div class="footer-container">
-          <nav
-            id="footer-nav"
-            class="Header-nav d-flex flex-row gap-3 justify-content-center justify-content-lg-start"
-          >
-            <div class="header-nav--a-link">
-              <a
-                href="/faq.html"
-                class="Header-nav-item multilingual-text"
-                data-test="template-nav"
-                >Запитання та вiдповiдi..FAQ..PYTANIA I ODPOWIEDZI..Вопросы и
-                ответы</a
-              >
-            </div>
-            <div class="header-nav--a-link">
-              <a
-                href="/contact.html"
-                class="Header-nav-item multilingual-text"
-                data-test="template-nav"
-                >Контакти..Contacts..Kontakty..Контакты</a
-              >
-            </div>
-          </nav>
-          <div class="footer--company-details row mx-0">
-            <div class="col-12 col-lg-2 text-center pb-4">
-              <img
-                src="/assets/images/deutshe_qualitat@2x.png"
-                class="img-fluid"
-                alt="Mahlzeit logo"
-              />
-            </div>
-            <div class="col-12 col-lg-10">
-              <div class="footer--company-details-text ps-3">
-                <a href="/contact.html">Виробник: ТОВ «Мальцайт ГМБХ»</a>
-                <p>
-                  <span class="multilingual-text">
-                    Адреса: вул. Лісна, 6Б, с. Білогородка, Бучанський р-н,
-                    Київська обл., 08140, Україна..Lysna St., 6B, Bilohorodka
-                    village, Buchanskyi district, Kyiv region, 08140,
-                    Ukraine..ul. Leśna, 6B, wieś Biłogorodka, rejon Buchański,
-                    obwód Kijowski, 08140, Ukraina..ул. Лесная, 6Б, с.
-                    Белогородка, Бучанский р-н, Киевская обл., 08140, Украина
-                  </span>
-                  <br />
-                  <span class="multilingual-text"
-                    >тел. ..phone..telefon..тел.</span
-                  >
-                  +380 44 384 06 76, office@mahlzeit.com.ua ,
-                  https://kulinariummeister.com , https://kulinarium-meister.com
-                </p>
-              </div>
-            </div>
-          </div>
-        </div>
-      </footer>'''
-
-
-def replace_header_footer(file_path):
-    """Replace header and footer in the given HTML file."""
+def splice_header_footer(content, templates, included=None):
+    """Splice the templates ({'header': ..., 'footer': ...}) into a document.
+
+    Returns (parts, changed): the new document as a list of slices of the
+    original content and template strings, and whether it differs from the
+    original. Nothing is concatenated, so callers can stream the parts.
+    The names of the templates spliced are added to the included set.
+    """
+    parts = []
+    changed = False
+    pos = 0
+    for start, end, name in find_elements(content):
+        template = templates[name]
+        if included is not None:
+            included.add(name)
+        if not changed and not (
+            end - start == len(template) and content.startswith(template, start)
+        ):
+            changed = True
+        parts.append(content[pos:start])
+        parts.append(template)
+        pos = end
+    parts.append(content[pos:])
+    return parts, changed
+
+
+def process_page(file_path, templates, dry_run=False, assets=None, page_dir='',
+                 minify=False, fragments=None, listing=None, catalog=None):
+    """Splice the templates into one page, timing each stage.
+
+    Returns a dict with the original 'content', the new document as
+    'parts', whether it 'changed', the sorted names of the partials it
+    'includes' and 'timings' (seconds spent reading, matching and
+    writing). With dry_run the page is never written. Given fragments
+    (from load_fragments) the page's out-of-date fragment includes are
+    re-rendered; for a listing page, given its listing from listings.json
+    and the catalog, so are its cards.
+    Given an asset manifest, asset references in the page (outside the
+    spliced templates) are rewritten too; page_dir is the page's directory
+    relative to the site root. With minify the new document is minified
+    before it is written, and 'changed' compares the minified output.
+    """
+    started = time.perf_counter()
+    with open(file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    read_done = time.perf_counter()
+
+    keyed = None
+    if listing is not None:
+        try:
+            keyed = keyed_cards(content, listing, catalog)
+        except ValueError as e:
+            raise ValueError(f"{e} (run render_listings.py)") from e
+
+    included = set()
+    parts, changed = splice_header_footer(content, templates, included)
+    # Even parts are slices of the page, odd parts are templates
+    for i in range(0, len(parts), 2):
+        rewritten = parts[i]
+        if fragments is not None and '<!-- partial:' in rewritten:
+            rewritten, names = splice_fragments(rewritten, fragments, keyed)
+            included |= names
+        if assets:
+            rewritten = rewrite_asset_refs(rewritten, page_dir, assets)
+        if rewritten != parts[i]:
+            parts[i] = rewritten
+            changed = True
+    if minify:
+        minified = minify_html(''.join(parts))
+        parts = [minified]
+        changed = minified != content
+    match_done = time.perf_counter()
+
+    # Only write if content changed
+    if changed and not dry_run:
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.writelines(parts)
+    write_done = time.perf_counter()
+
+    return {
+        'content': content,
+        'parts': parts,
+        'changed': changed,
+        'includes': sorted(included),
+        'timings': {
+            'read': read_done - started,
+            'match': match_done - read_done,
+            'write': write_done - match_done,
+        },
+    }
+
+
+def replace_header_footer(file_path, templates=None, fragments=None):
+    """Replace header and footer in the given HTML file.
+
+    templates defaults to the partials of contact.html from the template
+    registry, fragments to the fragment files of partials/.
+
+    Returns True if the file was rewritten, False if it was already up to
+    date and None if it could not be processed.
+    """
+    result = splice_file_result(file_path, templates, fragments)
+    return result and result['changed']
+
+
+def splice_file_result(file_path, templates=None, fragments=None, **options):
+    """process_page() with default partials, or None if the page fails.
+
+    options are passed on to process_page (assets, page_dir, ...).
+    """
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        original_content = content
-        
-        # Replace header - match from <header to </header> (including nested tags)
-        header_pattern = r'<header\b[^>]*>.*?</header>'
-        content = re.sub(header_pattern, TEMPLATE_HEADER, content, flags=re.DOTALL)
-        
-        # Replace footer - match from <footer to </footer> (including nested tags)
-        footer_pattern = r'<footer\b[^>]*>.*?</footer>'
-        content = re.sub(footer_pattern, TEMPLATE_FOOTER, content, flags=re.DOTALL)
-        
-        # Only write if content changed
-        if content != original_content:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            return True
-        return False
+        if templates is None:
+            templates = load_partials()
+        if fragments is None:
+            fragments = load_fragments()
+        return process_page(file_path, templates, fragments=fragments, **options)
     except Exception as e:
         print(f"Error processing {file_path}: {e}")
-        return False
+        return None
+
+
+def describe_change(key, result, show_diff):
+    """Return a unified diff of a page change, or a one-line byte delta."""
+    new_content = ''.join(result['parts'])
+    if show_diff:
+        return ''.join(difflib.unified_diff(
+            result['content'].splitlines(keepends=True),
+            new_content.splitlines(keepends=True),
+            fromfile=f'a/{key}',
+            tofile=f'b/{key}',
+        ))
+    old_size = len(result['content'].encode('utf-8'))
+    new_size = len(new_content.encode('utf-8'))
+    return f"    {old_size} -> {new_size} bytes ({new_size - old_size:+d})"
+
+
+def print_timings(timings, count):
+    """Print the count slowest pages with their read/match/write times."""
+    slowest = sorted(
+        timings.items(), key=lambda item: sum(item[1].values()), reverse=True
+    )[:count]
+    if not slowest:
+        return
+    width = max(len(key) for key, _ in slowest)
+    print(f"\nSlowest {len(slowest)} pages (ms):")
+    print(f"  {'page':<{width}}  {'read':>8}  {'match':>8}  {'write':>8}  {'total':>8}")
+    for key, stages in slowest:
+        total = sum(stages.values())
+        print(f"  {key:<{width}}  {stages['read'] * 1000:8.2f}  "
+              f"{stages['match'] * 1000:8.2f}  {stages['write'] * 1000:8.2f}  "
+              f"{total * 1000:8.2f}")
+
+
+def splice_file(file_path, template_source, partials_dir, assets=None, page_dir='',
+                minify=False, listing=None, catalog=None):
+    """Worker for watch mode: splice one page with the current partials.
+
+    Given an asset manifest the page's asset references are rewritten, and
+    with minify the page is minified, as in the initial run; a listing
+    page's cards are rendered from its listing and the catalog. Returns
+    (changed, included partial names), or None if the page failed.
+    """
+    result = splice_file_result(
+        file_path, load_partials(template_source), load_fragments(partials_dir),
+        assets=assets, page_dir=page_dir, minify=minify, listing=listing, catalog=catalog,
+    )
+    return result and (result['changed'], result['includes'])
+
+
+def load_cards(config):
+    """Return (listings, catalog) for rendering the listing cards.
+
+    The catalog is brought up to date first; without a listings.json there
+    are no cards, and the catalog is None.
+    """
+    if not os.path.exists(os.path.join(config['base_dir'], LISTINGS_NAME)):
+        return {}, None
+    return load_listings(config['base_dir']), update_catalog(config)[0]
+
+
+def current_partial_hashes(config):
+    """Return {name: hash} of the template partials and the fragments."""
+    hashes = dict(partial_hashes(config['template_source']))
+    for name, (_, sha256) in load_fragments(config['partials_dir']).items():
+        hashes[name] = sha256
+    return hashes
+
+
+def changed_partials(previous, current):
+    """Names of the partials added, removed or changed since previous."""
+    previous = previous or {}
+    return {
+        name for name in set(previous) | set(current)
+        if previous.get(name) != current.get(name)
+    }
+
+
+def dependent_pages(pages, names):
+    """Keys of the manifest pages that include any of the named partials."""
+    return {key for key, entry in pages.items() if names & set(entry.get('includes', ()))}
+
+
+def stat_key(file_path):
+    """Return (mtime_ns, size) for a file, or None if it has gone away."""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def poll_changes(config, index):
+    """Update the mtime index and return the set of new or modified files."""
+    changed = set()
+    current = {
+        page.path: (page.mtime_ns, page.size)
+        for page in discover_pages(config, warn=False)
+    }
+    template_source = config['template_source']
+    current[template_source] = stat_key(template_source)
+    partials_dir = config['partials_dir']
+    if os.path.isdir(partials_dir):
+        for name in os.listdir(partials_dir):
+            path = os.path.join(partials_dir, name)
+            current[path] = stat_key(path)
+    for file_path, key in current.items():
+        if key is not None and index.get(file_path) != key:
+            index[file_path] = key
+            changed.add(file_path)
+    for file_path in set(index) - set(current):
+        del index[file_path]
+    return changed
+
+
+def watch(config, manifest_path, jobs, interval, debounce, assets=None, minify=False):
+    """Re-splice pages as they are saved, and the pages including a partial
+    when the template or a fragment file is.
+
+    Polls an mtime index of the template, the fragments and the pages; a
+    burst of saves is collected until nothing has changed for `debounce`
+    seconds and then processed in parallel. assets is the asset manifest
+    of the initial --fingerprint run, if any, and minify whether it
+    minified the pages.
+    """
+    base_dir = config['base_dir']
+    template_source = config['template_source']
+    partials_dir = config['partials_dir']
+    index = {}
+    poll_changes(config, index)
+    print(f"\nWatching {len(index)} files (Ctrl+C to stop)...")
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        try:
+            while True:
+                time.sleep(interval)
+                changed = poll_changes(config, index)
+                if not changed:
+                    continue
+                while True:
+                    time.sleep(debounce)
+                    more = poll_changes(config, index)
+                    if not more:
+                        break
+                    changed |= more
+
+                manifest = load_manifest(manifest_path)
+                try:
+                    current_partials = current_partial_hashes(config)
+                except (OSError, ValueError) as e:
+                    print(f"Error loading the partials: {e}")
+                    continue
+                try:
+                    listings, catalog = load_cards(config)
+                except (OSError, ValueError) as e:
+                    print(f"Error loading {LISTINGS_NAME}: {e}")
+                    continue
+                site_pages = {page.rel_path: page.path for page in discover_pages(config)}
+                page_paths = set(site_pages.values())
+                targets = changed & page_paths
+                if manifest.get('partials') is None:
+                    print(f"No partial graph yet: re-splicing every page")
+                    targets = page_paths
+                else:
+                    names = changed_partials(manifest['partials'], current_partials)
+                    if names:
+                        dependents = dependent_pages(manifest['pages'], names)
+                        print(f"Partials changed ({', '.join(sorted(names))}): "
+                              f"re-splicing {len(dependents)} pages")
+                        targets |= {site_pages[key] for key in dependents if key in site_pages}
+                manifest['templates'] = partials_hash(template_source)
+                manifest['partials'] = current_partials
+                targets = sorted(targets)
+                if not targets:
+                    save_manifest(manifest_path, manifest)
+                    continue
+
+                keys = [os.path.relpath(path, base_dir).replace(os.sep, '/') for path in targets]
+                results = executor.map(
+                    splice_file, targets, [template_source] * len(targets),
+                    [partials_dir] * len(targets), [assets] * len(targets),
+                    [os.path.dirname(key) for key in keys], [minify] * len(targets),
+                    [listings.get(key) for key in keys], [catalog] * len(targets),
+                )
+                updated_count = 0
+                for file_path, key, result in zip(targets, keys, results):
+                    if result is None:
+                        manifest['pages'].pop(key, None)
+                        continue
+                    updated, includes = result
+                    if updated:
+                        updated_count += 1
+                        print(f"  ✓ Updated {key}")
+                    # Our own writes must not trigger another round
+                    index[file_path] = stat_key(file_path)
+                    manifest['pages'][key] = dict(page_fingerprint(file_path), includes=includes)
+                save_manifest(manifest_path, manifest)
+                print(f"Updated {updated_count} out of {len(targets)} changed files.")
+        except KeyboardInterrupt:
+            print("\nStopped watching.")
 
 
 def main():
     """Main function to process all HTML files."""
-    base_dir = '/Users/danielkraig/Developer/kulinarium_files/kulinarium-meister'
-    
-    # Collect all HTML files from specified directories
-    html_files = []
-    
-    # Root directory HTML files (excluding contact.html as it's the template)
-    root_files = [
-        'index.html',
-        'dough-for-baking.html',
-        'tisto-dlya-pelmeniv.html',
-        'ready-to-cook.html',
-        'pasta.html',
-        'frozen.html',
-        'ravioli.html',
-        'faq.html',
-        'recipes.html'
-    ]
-    
-    for file in root_files:
-        file_path = os.path.join(base_dir, file)
-        if os.path.exists(file_path):
-            html_files.append(file_path)
-    
-    # recipe_details directory
-    recipe_details_dir = os.path.join(base_dir, 'recipe_details')
-    if os.path.exists(recipe_details_dir):
-        for file in os.listdir(recipe_details_dir):
-            if file.endswith('.html'):
-                html_files.append(os.path.join(recipe_details_dir, file))
-    
-    # product_pages directory
-    product_pages_dir = os.path.join(base_dir, 'product_pages')
-    if os.path.exists(product_pages_dir):
-        for file in os.listdir(product_pages_dir):
-            if file.endswith('.html'):
-                html_files.append(os.path.join(product_pages_dir, file))
-    
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='ignore the manifest and process every page',
+    )
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='report what would change without writing pages or the manifest',
+    )
+    parser.add_argument(
+        '--diff',
+        action='store_true',
+        help='with --dry-run, print a unified diff instead of a byte delta',
+    )
+    parser.add_argument(
+        '--slowest',
+        type=int,
+        metavar='N',
+        help='print the N slowest pages (default: 10 with --dry-run)',
+    )
+    parser.add_argument(
+        '--fingerprint',
+        action='store_true',
+        help='fingerprint CSS/JS assets and rewrite the pages\' references to them',
+    )
+    parser.add_argument(
+        '--minify',
+        action='store_true',
+        help='strip insignificant whitespace and comments from the pages written',
+    )
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='after the initial run, keep re-splicing pages as they are saved',
+    )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=os.cpu_count() or 1,
+        help='worker processes used in watch mode (default: one per CPU core)',
+    )
+    parser.add_argument(
+        '--interval',
+        type=float,
+        default=1.0,
+        help='seconds between polls in watch mode (default: 1.0)',
+    )
+    parser.add_argument(
+        '--debounce',
+        type=float,
+        default=0.5,
+        help='quiet period before a burst of saves is processed (default: 0.5)',
+    )
+    parser.add_argument(
+        '--config',
+        help='site config listing the pages to process (default: site_config.json)',
+    )
+    args = parser.parse_args()
+    if args.watch and args.dry_run:
+        parser.error('--watch cannot be combined with --dry-run')
+    slowest = args.slowest if args.slowest is not None else (10 if args.dry_run else 0)
+
+    config = load_config(args.config)
+    base_dir = config['base_dir']
+    site_pages = discover_pages(config)
+
+    # Header and footer partials from the template source (contact.html),
+    # and the fragments pages include from partials/
+    template_source = config['template_source']
+    templates = load_partials(template_source)
+    fragments = load_fragments(config['partials_dir'])
+
+    # The listing pages' cards are rendered from listings.json and the catalog
+    listings, catalog = load_cards(config)
+
+    # Content-hashed copies of the CSS/JS assets; the template source is
+    # spliced with its own partials, so only its references change
+    assets = None
+    if args.fingerprint:
+        assets = build_assets(base_dir, dry_run=args.dry_run)
+        if os.path.exists(template_source):
+            result = process_page(
+                template_source, templates, dry_run=args.dry_run, assets=assets,
+                page_dir=os.path.dirname(os.path.relpath(template_source, base_dir)),
+            )
+            if result['changed']:
+                print(f"  ✓ Updated asset references in {os.path.basename(template_source)}")
+
+    # Load the manifest; an asset or mode change invalidates every entry,
+    # a changed partial only the entries of the pages including it
+    manifest_path = os.path.join(base_dir, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    current_partials = current_partial_hashes(config)
+    current_assets = manifest_hash(assets) if assets else manifest.get('assets')
+    if (args.force or manifest.get('partials') is None
+            or manifest.get('assets') != current_assets
+            or manifest.get('minify', False) != args.minify):
+        manifest = {'assets': current_assets, 'minify': args.minify, 'pages': {}}
+    pages = manifest['pages']
+    dependents = set()
+    if pages:
+        names = changed_partials(manifest['partials'], current_partials)
+        dependents = dependent_pages(pages, names)
+        if names:
+            print(f"Partials changed ({', '.join(sorted(names))}): "
+                  f"{len(dependents)} pages include them")
+    manifest['templates'] = partials_hash(template_source)
+    manifest['partials'] = current_partials
+
     # Process all files
     updated_count = 0
-    for file_path in html_files:
+    skipped_count = 0
+    timings = {}
+    for page in site_pages:
+        file_path, key = page.path, page.rel_path
+        entry = pages.get(key)
+        needed, fingerprint = needs_processing(page, entry)
+        if key in dependents:
+            needed = True
+        if not needed:
+            pages[key] = dict(fingerprint, includes=entry.get('includes', []))
+            skipped_count += 1
+            continue
+
         print(f"Processing: {file_path}")
-        if replace_header_footer(file_path):
+        try:
+            result = process_page(
+                file_path, templates, dry_run=args.dry_run,
+                assets=assets, page_dir=os.path.dirname(key), minify=args.minify,
+                fragments=fragments, listing=listings.get(key), catalog=catalog,
+            )
+        except Exception as e:
+            print(f"Error processing {file_path}: {e}")
+            pages.pop(key, None)
+            continue
+        timings[key] = result['timings']
+        if result['changed']:
             updated_count += 1
-            print(f"  ✓ Updated")
+            if args.dry_run:
+                print(f"  ~ Would update")
+                print(describe_change(key, result, args.diff))
+            else:
+                pages[key] = dict(page_fingerprint(file_path), includes=result['includes'])
+                print(f"  ✓ Updated")
         else:
+            pages[key] = dict(fingerprint, includes=result['includes'])
             print(f"  - No changes needed")
-    
-    print(f"\nCompleted! Updated {updated_count} out of {len(html_files)} files.")
+
+    # Forget pages that no longer exist
+    current_keys = {page.rel_path for page in site_pages}
+    for key in set(pages) - current_keys:
+        del pages[key]
+    if not args.dry_run:
+        save_manifest(manifest_path, manifest)
+
+    print_timings(timings, slowest)
+
+    action = 'Would update' if args.dry_run else 'Updated'
+    print(f"\nCompleted! {action} {updated_count} out of {len(site_pages)} files"
+          f" ({skipped_count} unchanged since the last run).")
+
+    if args.watch:
+        watch(config, manifest_path, max(1, args.jobs), args.interval, args.debounce,
+              assets=assets, minify=args.minify)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Generate responsive width variants of assets/images and point the pages'
+<img> tags at them with srcset/sizes.
+
+Each source image is resized to the widths in WIDTHS that are smaller than
+itself, in a process pool. Variants are written under
+assets/images/responsive/ and recorded in a manifest keyed by the source's
+content hash, so only new or changed images are resized on later runs.
+Requires Pillow (pip install Pillow).
+
+An <img> without a sizes attribute gets one worked out from the Bootstrap
+grid columns (col-*, row-cols-*) it sits in, so a thumbnail in a
+three-column grid isn't fetched at the full viewport width. Images that
+are in no grid column and have no sizes of their own get no srcset.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+from site_pages import discover_pages, load_config, write_atomic
+
+# Target widths in pixels; an image only gets the ones narrower than itself
+WIDTHS = (480, 800, 1200)
+
+IMAGE_DIR = 'assets/images'
+IMAGE_EXTENSIONS = ('.webp', '.png', '.jpg', '.jpeg')
+
+# Variants and their manifest live here, mirroring the layout of IMAGE_DIR
+OUTPUT_DIR = 'assets/images/responsive'
+MANIFEST_NAME = 'manifest.json'
+
+# Bootstrap grid breakpoints (infix, min-width in px), smallest first
+BREAKPOINTS = (('', 0), ('sm', 576), ('md', 768), ('lg', 992), ('xl', 1200), ('xxl', 1400))
+
+COL_CLASS_PATTERN = re.compile(r'col(?:-(sm|md|lg|xl|xxl))?(?:-(\d+|auto))?')
+ROW_COLS_CLASS_PATTERN = re.compile(r'row-cols(?:-(sm|md|lg|xl|xxl))?-(\d+)')
+
+# Tags without an end tag, which never become an ancestor
+VOID_TAGS = frozenset((
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'source', 'track', 'wbr',
+))
+
+# Encoder options per format
+SAVE_OPTIONS = {
+    'WEBP': {'quality': 80, 'method': 6},
+    'PNG': {'optimize': True},
+    'JPEG': {'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+IMG_TAG_PATTERN = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def find_images(base_dir):
+    """Return the relative paths of all source images, skipping the variants."""
+    images = []
+    for root, dirs, files in os.walk(os.path.join(base_dir, IMAGE_DIR)):
+        rel_root = os.path.relpath(root, base_dir).replace(os.sep, '/')
+        if rel_root == OUTPUT_DIR:
+            dirs[:] = []
+            continue
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                images.append(f'{rel_root}/{name}')
+    return images
+
+
+def variant_path(rel_path, width):
+    """Relative path of one width variant of a source image."""
+    sub_path = rel_path[len(IMAGE_DIR) + 1:]
+    stem, ext = os.path.splitext(sub_path)
+    return f'{OUTPUT_DIR}/{stem}-{width}w{ext}'
+
+
+def resize_image(base_dir, rel_path, sha256):
+    """Write the width variants of one image and return its manifest entry."""
+    source = os.path.join(base_dir, *rel_path.split('/'))
+    with Image.open(source) as image:
+        image_format = image.format
+        width, height = image.size
+        variants = {}
+        for target_width in WIDTHS:
+            if target_width >= width:
+                continue
+            target_height = max(1, round(height * target_width / width))
+            resized = image.resize((target_width, target_height), Image.LANCZOS)
+            rel_variant = variant_path(rel_path, target_width)
+            target = os.path.join(base_dir, *rel_variant.split('/'))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            resized.save(target, image_format, **SAVE_OPTIONS.get(image_format, {}))
+            variants[str(target_width)] = rel_variant
+    return {'sha256': sha256, 'width': width, 'height': height, 'variants': variants}
+
+
+def _resize_job(job):
+    base_dir, rel_path, sha256 = job
+    try:
+        return rel_path, resize_image(base_dir, rel_path, sha256), None
+    except Exception as e:
+        return rel_path, None, str(e)
+
+
+def load_manifest(manifest_path):
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def build_variants(base_dir, manifest, jobs):
+    """Resize new and changed images; return the number of images processed."""
+    images = find_images(base_dir)
+    pending = []
+    for rel_path in images:
+        sha256 = file_sha256(os.path.join(base_dir, *rel_path.split('/')))
+        entry = manifest.get(rel_path)
+        if entry and entry['sha256'] == sha256 and all(
+            os.path.exists(os.path.join(base_dir, *variant.split('/')))
+            for variant in entry['variants'].values()
+        ):
+            continue
+        pending.append((base_dir, rel_path, sha256))
+
+    # Drop variants of images that no longer exist
+    for rel_path in set(manifest) - set(images):
+        for variant in manifest.pop(rel_path)['variants'].values():
+            path = os.path.join(base_dir, *variant.split('/'))
+            if os.path.exists(path):
+                os.unlink(path)
+            print(f"🗑️  Removed {variant}")
+
+    if jobs > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(_resize_job, pending))
+    else:
+        results = [_resize_job(job) for job in pending]
+
+    for rel_path, entry, error in results:
+        if error:
+            print(f"❌ Error resizing {rel_path}: {error}")
+            manifest.pop(rel_path, None)
+            continue
+        manifest[rel_path] = entry
+        widths = ', '.join(entry['variants']) or 'none needed'
+        print(f"✅ Resized {rel_path} ({entry['width']}px -> {widths})")
+    return len(pending)
+
+
+def srcset_for(rel_path, entry):
+    """srcset value listing the variants and the original image."""
+    candidates = [
+        f'/{variant} {width}w'
+        for width, variant in sorted(entry['variants'].items(), key=lambda item: int(item[0]))
+    ]
+    candidates.append(f'/{rel_path} {entry["width"]}w')
+    return ', '.join(candidates)
+
+
+def set_attribute(tag, name, value, after=None):
+    """Set an attribute on a start tag, keeping the tag's formatting.
+
+    A new attribute is placed after the `after` attribute, using the same
+    whitespace that precedes it, or before the end of the tag.
+    """
+    existing = re.search(rf'(\s){name}\s*=\s*("[^"]*"|\'[^\']*\')', tag)
+    if existing:
+        return f'{tag[:existing.start(2)]}"{value}"{tag[existing.end(2):]}'
+    anchor = after and re.search(rf'(\s+){after}\s*=\s*("[^"]*"|\'[^\']*\')', tag)
+    if anchor:
+        return f'{tag[:anchor.end()]}{anchor.group(1)}{name}="{value}"{tag[anchor.end():]}'
+    end = len(tag) - (2 if tag.endswith('/>') else 1)
+    return f'{tag[:end].rstrip()} {name}="{value}" {tag[end:].lstrip()}'
+
+
+def breakpoint_values(classes, pattern):
+    """Return the value of the pattern's classes at each breakpoint, or None.
+
+    A class applies from its breakpoint up, until a larger one overrides it.
+    """
+    values = [None] * len(BREAKPOINTS)
+    infixes = [infix for infix, _ in BREAKPOINTS]
+    found = False
+    for name in classes:
+        match = pattern.fullmatch(name)
+        if match:
+            values[infixes.index(match.group(1) or '')] = match.group(2) or ''
+            found = True
+    if not found:
+        return None
+    for i in range(1, len(values)):
+        if values[i] is None:
+            values[i] = values[i - 1]
+    return values
+
+
+def column_fractions(classes, parent_classes):
+    """Fraction of its row a column takes at each breakpoint, or None if the
+    element isn't a grid column."""
+    spans = breakpoint_values(classes, COL_CLASS_PATTERN)
+    if spans is None:
+        return None
+    row_cols = breakpoint_values(parent_classes, ROW_COLS_CLASS_PATTERN) or [None] * len(spans)
+    fractions = []
+    for span, columns in zip(spans, row_cols):
+        if span and span != 'auto':
+            fractions.append(int(span) / 12)
+        elif span == '' and columns:
+            fractions.append(1 / int(columns))
+        else:
+            # Not sized (yet) at this breakpoint, or sized by its content
+            fractions.append(1)
+    return fractions
+
+
+def sizes_value(fractions):
+    """sizes attribute for an image taking the given viewport fractions."""
+    entries = []
+    for i in range(len(BREAKPOINTS) - 1, 0, -1):
+        if fractions[i] != fractions[i - 1]:
+            entries.append(f'(min-width: {BREAKPOINTS[i][1]}px) {fractions[i] * 100:.4g}vw')
+    entries.append(f'{fractions[0] * 100:.4g}vw')
+    return ', '.join(entries)
+
+
+class _GridSizes(HTMLParser):
+    """Maps the offset of every <img> inside a grid column to its sizes value."""
+
+    def __init__(self, content):
+        super().__init__(convert_charrefs=True)
+        self.line_offsets = [0]
+        for line in content.splitlines(keepends=True):
+            self.line_offsets.append(self.line_offsets[-1] + len(line))
+        self.stack = []
+        self.sizes = {}
+
+    def handle_starttag(self, tag, attrs):
+        classes = (dict(attrs).get('class') or '').split()
+        parent = self.stack[-1] if self.stack else (None, [], None)
+        fractions = parent[2]
+        own = column_fractions(classes, parent[1])
+        if own:
+            fractions = [a * b for a, b in zip(fractions or [1] * len(own), own)]
+        if tag == 'img':
+            if fractions:
+                line, column = self.getpos()
+                self.sizes[self.line_offsets[line - 1] + column] = sizes_value(fractions)
+        elif tag not in VOID_TAGS:
+            self.stack.append((tag, classes, fractions))
+
+    def handle_endtag(self, tag):
+        # Pop up to the matching start tag, tolerating unclosed elements
+        for depth in range(len(self.stack) - 1, -1, -1):
+            if self.stack[depth][0] == tag:
+                del self.stack[depth:]
+                return
+
+
+def grid_sizes(content):
+    """Return {offset of an <img> tag: sizes value} for the images in grid columns."""
+    parser = _GridSizes(content)
+    parser.feed(content)
+    parser.close()
+    return parser.sizes
+
+
+def rewrite_img_tags(content, page_dir, manifest):
+    """Add srcset/sizes to every <img> whose source has variants.
+
+    An image without a sizes attribute needs to be in a grid column to get
+    one; other images are left without a srcset.
+    """
+    sizes = grid_sizes(content)
+
+    def replace(match):
+        tag = match.group(0)
+        src = re.search(r'\ssrc\s*=\s*(?:"([^"]*)"|\'([^\']*)\')', tag)
+        if not src:
+            return tag
+        url = (src.group(1) if src.group(1) is not None else src.group(2)).strip()
+        if not url or url.startswith('//') or urlsplit(url).scheme:
+            return tag
+        rel_path = urlsplit(urljoin(f'/{page_dir}/' if page_dir else '/', url)).path.lstrip('/')
+        entry = manifest.get(rel_path)
+        if not entry or not entry['variants']:
+            return tag
+        has_sizes = re.search(r'\ssizes\s*=', tag)
+        if not has_sizes and match.start() not in sizes:
+            return tag
+        tag = set_attribute(tag, 'srcset', srcset_for(rel_path, entry), after='src')
+        if not has_sizes:
+            tag = set_attribute(tag, 'sizes', sizes[match.start()], after='srcset')
+        return tag
+
+    return IMG_TAG_PATTERN.sub(replace, content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--config',
+        help='site config listing the pages to process (default: site_config.json)',
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=0,
+        help='number of worker processes (0 = one per CPU core, default: 0)',
+    )
+    args = parser.parse_args()
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+
+    if Image is None:
+        print("❌ Pillow is required to resize images: pip install Pillow")
+        sys.exit(1)
+
+    config = load_config(args.config)
+    base_dir = config['base_dir']
+    manifest_path = os.path.join(base_dir, *OUTPUT_DIR.split('/'), MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+
+    resized = build_variants(base_dir, manifest, jobs)
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    write_atomic(manifest_path, json.dumps(manifest, indent=2, sort_keys=True) + '\n')
+
+    # The template source carries the shared header, so it is rewritten too
+    page_paths = [page.path for page in discover_pages(config)]
+    if os.path.exists(config['template_source']):
+        page_paths.append(config['template_source'])
+
+    updated_count = 0
+    for path in sorted(set(page_paths)):
+        rel_path = os.path.relpath(path, base_dir).replace(os.sep, '/')
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            new_content = rewrite_img_tags(content, os.path.dirname(rel_path), manifest)
+            if new_content != content:
+                write_atomic(path, new_content)
+                updated_count += 1
+                print(f"✅ Updated: {rel_path}")
+        except Exception as e:
+            print(f"❌ Error processing {rel_path}: {e}")
+
+    print(f"\n✅ Resized {resized} images; updated {updated_count} of {len(page_paths)} pages")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+"""
+Page discovery shared by the build scripts.
+
+Which pages make up the site is configured in site_config.json (include
+and exclude globs relative to the site root, plus the template source
+page), so replace_header_footer.py, replace_headers.py and the other
+build stages all work on the same page set.
+
+Directories are listed with os.scandir; listings are cached per directory
+and reused while the directory's mtime is unchanged. A fresh listing keeps
+each file's DirEntry.stat() result, so pages found in it aren't stat'ed
+again, and each page carries its stat fields so callers don't either.
+"""
+import fnmatch
+import json
+import os
+import shutil
+import tempfile
+from collections import namedtuple
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_PATH = os.path.join(BASE_DIR, 'site_config.json')
+
+# Used when there is no config file
+DEFAULT_CONFIG = {
+    'template_source': 'contact.html',
+    'partials_dir': 'partials',
+    'include': ['*.html', 'recipe_details/*.html', 'product_pages/*.html'],
+    'exclude': ['contact.html'],
+    'site_url': 'https://kulinariummeister.com',
+}
+
+# A discovered page: absolute path, path relative to the site root (always
+# with forward slashes) and the stat fields used for change detection
+Page = namedtuple('Page', 'path rel_path mtime_ns size')
+
+# directory -> (directory mtime_ns, [(name, is_dir, stat)])
+_listing_cache = {}
+
+
+def load_config(config_path=None):
+    """Load the site config, resolving base_dir and template_source to paths.
+
+    Without an explicit config_path the config next to this module is used,
+    falling back to DEFAULT_CONFIG if it doesn't exist. An explicitly given
+    config that can't be read is an error.
+    """
+    path = config_path or CONFIG_PATH
+    config = dict(DEFAULT_CONFIG)
+    if config_path or os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            config.update(json.load(f))
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    config['base_dir'] = os.path.abspath(
+        os.path.join(base_dir, config.get('base_dir', '.'))
+    )
+    config['template_source'] = os.path.join(
+        config['base_dir'], config['template_source']
+    )
+    config['partials_dir'] = os.path.join(config['base_dir'], config['partials_dir'])
+    return config
+
+
+def match_path(rel_path, pattern):
+    """Match a relative path against a glob, one path segment at a time.
+
+    Unlike fnmatch, '*' never crosses a '/'; a '**' segment matches any
+    number of directories.
+    """
+    return _match_segments(rel_path.split('/'), pattern.split('/'))
+
+
+def _match_segments(parts, pattern_parts):
+    if not pattern_parts:
+        return not parts
+    head, rest = pattern_parts[0], pattern_parts[1:]
+    if head == '**':
+        return any(_match_segments(parts[i:], rest) for i in range(len(parts) + 1))
+    if not parts or not fnmatch.fnmatchcase(parts[0], head):
+        return False
+    return _match_segments(parts[1:], rest)
+
+
+def _scan_root(pattern):
+    """Return (static directory prefix, recursive) for an include glob."""
+    parts = pattern.split('/')[:-1]
+    prefix = []
+    for part in parts:
+        if any(char in part for char in '*?['):
+            return '/'.join(prefix), True
+        prefix.append(part)
+    return '/'.join(prefix), False
+
+
+def _entry_stat(entry):
+    try:
+        return entry.stat()
+    except OSError:
+        return None
+
+
+def _list_dir(directory):
+    """Return ([(name, is_dir, stat)], fresh) for a directory, cached by its mtime.
+
+    stat is the file's DirEntry.stat() result from the scan (None for
+    directories and files that can't be stat'ed). Editing a file in place
+    doesn't change its directory's mtime, so the stats of a cached listing
+    (fresh False) may be out of date.
+    """
+    try:
+        mtime_ns = os.stat(directory).st_mtime_ns
+    except OSError:
+        return [], True
+    cached = _listing_cache.get(directory)
+    if cached and cached[0] == mtime_ns:
+        return cached[1], False
+    entries = []
+    with os.scandir(directory) as it:
+        for entry in it:
+            is_dir = entry.is_dir(follow_symlinks=False)
+            entries.append((entry.name, is_dir, None if is_dir else _entry_stat(entry)))
+    entries.sort(key=lambda entry: entry[0])
+    _listing_cache[directory] = (mtime_ns, entries)
+    return entries, True
+
+
+def _walk(base_dir, rel_dir, recursive):
+    """Yield (relative path, stat, fresh) for the files under rel_dir."""
+    directory = os.path.join(base_dir, rel_dir) if rel_dir else base_dir
+    entries, fresh = _list_dir(directory)
+    for name, is_dir, stat in entries:
+        if name.startswith('.'):
+            continue
+        rel_path = f'{rel_dir}/{name}' if rel_dir else name
+        if is_dir:
+            if recursive and name != 'node_modules':
+                yield from _walk(base_dir, rel_path, recursive)
+        else:
+            yield rel_path, stat, fresh
+
+
+def discover_pages(config, warn=True):
+    """Return the site's pages as a sorted list of Page tuples.
+
+    With warn set, include patterns that match nothing are reported, since
+    a missing directory would otherwise silently shrink the page set.
+    """
+    base_dir = config['base_dir']
+    include = config['include']
+    exclude = config['exclude']
+
+    roots = {}
+    for pattern in include:
+        rel_dir, recursive = _scan_root(pattern)
+        roots[rel_dir] = roots.get(rel_dir, False) or recursive
+
+    pages = {}
+    matched = set()
+    for rel_dir, recursive in roots.items():
+        for rel_path, stat, fresh in _walk(base_dir, rel_dir, recursive):
+            if rel_path in pages:
+                continue
+            patterns = [p for p in include if match_path(rel_path, p)]
+            if not patterns:
+                continue
+            matched.update(patterns)
+            if any(match_path(rel_path, p) for p in exclude):
+                continue
+            path = os.path.join(base_dir, *rel_path.split('/'))
+            if not fresh:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+            elif stat is None:
+                continue
+            pages[rel_path] = Page(path, rel_path, stat.st_mtime_ns, stat.st_size)
+
+    if warn:
+        for pattern in include:
+            if pattern not in matched:
+                print(f"⚠️  Include pattern {pattern!r} matched no pages in {base_dir}")
+
+    return [pages[rel_path] for rel_path in sorted(pages)]
+
+
+def write_atomic(file_path, content):
+    """Write content to a temp file next to file_path, then rename it into place.
+
+    content is text written as UTF-8, or bytes written as they are.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+    try:
+        if isinstance(content, bytes):
+            f = os.fdopen(fd, 'wb')
+        else:
+            f = os.fdopen(fd, 'w', encoding='utf-8')
+        with f:
+            f.write(content)
+        if os.path.exists(file_path):
+            shutil.copymode(file_path, tmp_path)
+        else:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
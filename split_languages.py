@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Build per-language static variants of every page.
+
+Pages carry their text in all four languages as "uk..en..pl..ru" inside
+.multilingual-text elements, and src/js/lang-switcher.js picks one on the
+client after load. This script does the same split at build time and
+writes /uk/, /en/, /pl/ and /ru/ copies of each page, with hreflang links
+between them, so visitors only download one language.
+"""
+import argparse
+import html
+import os
+import re
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from itertools import repeat
+from urllib.parse import urljoin, urlsplit
+
+from asset_fingerprints import strip_fingerprint
+from site_pages import Page, discover_pages, load_config, write_atomic
+
+# Same order as the ".."-separated text and lang-switcher.js
+Language = namedtuple('Language', 'code flag locale')
+LANGUAGES = [
+    Language('uk', '🇺🇦', 'uk_UA'),
+    Language('en', '🇬🇧', 'en_US'),
+    Language('pl', '🇵🇱', 'pl_PL'),
+    Language('ru', '[Ru]', 'ru_RU'),
+]
+
+SEPARATOR = '..'
+
+# Elements without a closing tag
+VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+    'meta', 'param', 'source', 'track', 'wbr',
+}
+
+# Translated attributes of .multilingual-text / .multilingual-placeholder
+TRANSLATED_ATTRIBUTES = ('title', 'alt', 'placeholder', 'value')
+
+# URL-valued attributes rewritten for the deeper /<lang>/ location
+URL_ATTRIBUTES = ('href', 'src', 'srcset')
+
+ATTRIBUTE_PATTERN = re.compile(
+    r'''(\s)([\w:-]+)(\s*=\s*)(?:"([^"]*)"|'([^']*)')'''
+)
+
+# Script that switches languages on the client; not needed once split
+SWITCHER_SCRIPT = 'lang-switcher.js'
+
+
+def split_text(text, index):
+    """Return the text for one language, or None if it isn't multilingual."""
+    parts = text.split(SEPARATOR)
+    if len(parts) < 2 or len(parts) <= index:
+        return None
+    return parts[index].strip()
+
+
+def page_url(rel_path, lang=None):
+    """Root-relative URL of a page, optionally inside a language directory."""
+    path = '/' if rel_path == 'index.html' else f'/{rel_path}'
+    return f'/{lang}{path}' if lang else path
+
+
+def rewrite_url(url, page_dir, page_set, lang):
+    """Make a URL work from /<lang>/<page>.
+
+    Relative URLs are resolved against the original page and made
+    root-absolute; links to pages that get variants point at the variant
+    for the same language. External URLs and fragments are left alone.
+    """
+    url = url.strip()
+    if not url or url.startswith(('#', '//')) or urlsplit(url).scheme:
+        return url
+    resolved = urljoin(f'/{page_dir}/' if page_dir else '/', url)
+    parts = urlsplit(resolved)
+    path = parts.path
+    target = path.lstrip('/')
+    if path.endswith('/'):
+        target += 'index.html'
+    if target not in page_set:
+        return resolved
+    suffix = resolved[len(path):]
+    return page_url(target, lang) + suffix
+
+
+class _LanguageSplitter(HTMLParser):
+    """Collect the edits that turn a multilingual page into each language.
+
+    The page is parsed once for all languages and never re-serialised:
+    edits are [start, end, texts] ranges of the original markup with one
+    replacement text per language, so everything that isn't translated
+    stays byte-for-byte identical.
+    """
+
+    def __init__(self, content, rel_path, page_set, site_url):
+        super().__init__(convert_charrefs=False)
+        self.content = content
+        self.rel_path = rel_path
+        self.page_dir = os.path.dirname(rel_path).replace(os.sep, '/')
+        self.page_set = page_set
+        self.site_url = site_url.rstrip('/')
+
+        # Offset of the first character of each line, for getpos()
+        self.line_offsets = [0]
+        for match in re.finditer('\n', content):
+            self.line_offsets.append(match.end())
+
+        self.edits = []
+        self.stack = []
+        self.text_start = None
+        self.switcher_start = None
+
+    def position(self):
+        line, column = self.getpos()
+        return self.line_offsets[line - 1] + column
+
+    # Text
+
+    def handle_data(self, data):
+        if self.text_start is None:
+            self.text_start = self.position()
+
+    handle_entityref = handle_data
+    handle_charref = handle_data
+
+    def flush_text(self):
+        """Translate the text run that ends where the current markup starts."""
+        if self.text_start is None:
+            return
+        start, end = self.text_start, self.position()
+        self.text_start = None
+        raw = self.content[start:end]
+        if not raw.strip():
+            return
+        if any(element['flag'] for element in self.stack):
+            texts = [html.escape(lang.flag, quote=False) for lang in LANGUAGES]
+            self.edits.append([start, end, texts])
+            return
+        multilingual = [element for element in self.stack if element['multilingual']]
+        text = html.unescape(raw)
+        if not multilingual or SEPARATOR not in text:
+            return
+        texts = []
+        for index in range(len(LANGUAGES)):
+            part = split_text(text, index)
+            if part is None:
+                texts.append(raw)
+                continue
+            texts.append(html.escape(part, quote=False))
+            if not part:
+                # lang-switcher.js hides elements without a translation
+                tag_texts = multilingual[-1]['tag_edit'][2]
+                tag_texts[index] = add_attribute(tag_texts[index], 'hidden')
+        self.edits.append([start, end, texts])
+
+    # Markup
+
+    def handle_starttag(self, tag, attrs):
+        self.flush_text()
+        self.start_element(tag, attrs, self_closing=tag in VOID_TAGS)
+
+    def handle_startendtag(self, tag, attrs):
+        self.flush_text()
+        self.start_element(tag, attrs, self_closing=True)
+
+    def handle_endtag(self, tag):
+        self.flush_text()
+        start = self.position()
+        end = self.content.index('>', start) + 1
+        if tag == 'head':
+            texts = [self.head_additions(index) for index in range(len(LANGUAGES))]
+            self.edits.append([start, start, texts])
+        elif tag == 'script' and self.switcher_start is not None:
+            self.edits.append([self.switcher_start, end, [''] * len(LANGUAGES)])
+            self.switcher_start = None
+        if any(element['tag'] == tag for element in self.stack):
+            while self.stack.pop()['tag'] != tag:
+                pass
+
+    def handle_comment(self, data):
+        self.flush_text()
+        # Fragment include markers only matter to the page source
+        if data.lstrip().startswith(('partial:', '/partial:')):
+            start = self.position()
+            end = self.content.index('-->', start) + 3
+            line_start = self.content.rfind('\n', 0, start) + 1
+            if not self.content[line_start:start].strip() and self.content.startswith('\n', end):
+                start, end = line_start, end + 1
+            self.edits.append([start, end, [''] * len(LANGUAGES)])
+
+    def handle_decl(self, decl):
+        self.flush_text()
+
+    def handle_pi(self, data):
+        self.flush_text()
+
+    def unknown_decl(self, data):
+        self.flush_text()
+
+    def close(self):
+        super().close()
+        self.flush_text()
+
+    def start_element(self, tag, attrs, self_closing):
+        start = self.position()
+        raw = self.get_starttag_text()
+        attributes = dict(attrs)
+        classes = (attributes.get('class') or '').split()
+
+        if tag == 'script' and strip_fingerprint(attributes.get('src') or '').endswith(SWITCHER_SCRIPT):
+            self.switcher_start = start
+            return
+
+        multilingual = 'multilingual-text' in classes
+        texts = [
+            self.rewrite_tag(tag, raw, attributes, classes, multilingual, index)
+            for index in range(len(LANGUAGES))
+        ]
+        tag_edit = [start, start + len(raw), texts]
+        self.edits.append(tag_edit)
+
+        if not self_closing:
+            self.stack.append({
+                'tag': tag,
+                'multilingual': multilingual,
+                'flag': 'current-language-flag' in classes,
+                'tag_edit': tag_edit,
+            })
+
+    def rewrite_tag(self, tag, raw, attributes, classes, multilingual, index):
+        """Return the start tag with its attributes adjusted for one language."""
+        lang = LANGUAGES[index]
+        translated = multilingual or 'multilingual-placeholder' in classes
+        language_option = 'language-option' in classes and 'data-lang' in attributes
+
+        def replace(match):
+            space, name, equals, double, single = match.groups()
+            original = html.unescape(double if double is not None else single)
+            value = original
+            lowered = name.lower()
+            if translated and lowered in TRANSLATED_ATTRIBUTES:
+                text = split_text(value, index)
+                if text is not None:
+                    value = text
+            elif language_option and lowered == 'href':
+                value = self.variant_url(attributes['data-lang'])
+            elif (tag == 'link' and lowered == 'href' and attributes.get('rel') == 'canonical'
+                  or tag == 'meta' and lowered == 'content'
+                  and attributes.get('property') == 'og:url'):
+                value = self.site_url + page_url(self.rel_path, lang.code)
+            elif lowered in URL_ATTRIBUTES:
+                value = self.rewrite_url_attribute(lowered, value, lang)
+            elif tag == 'html' and lowered == 'lang':
+                value = lang.code
+            if value == original:
+                return match.group(0)
+            return f'{space}{name}{equals}"{html.escape(value)}"'
+
+        return ATTRIBUTE_PATTERN.sub(replace, raw)
+
+    def rewrite_url_attribute(self, name, value, lang):
+        if name == 'srcset':
+            candidates = []
+            for candidate in value.split(','):
+                pieces = candidate.strip().split(None, 1)
+                if pieces:
+                    pieces[0] = rewrite_url(pieces[0], self.page_dir, self.page_set, lang.code)
+                    candidates.append(' '.join(pieces))
+            return ', '.join(candidates)
+        return rewrite_url(value, self.page_dir, self.page_set, lang.code)
+
+    def variant_url(self, lang_index):
+        try:
+            lang = LANGUAGES[int(lang_index)]
+        except (ValueError, IndexError):
+            return 'javascript:void(0)'
+        return page_url(self.rel_path, lang.code)
+
+    def head_additions(self, index):
+        """hreflang alternates and the content language, inserted before </head>."""
+        code = LANGUAGES[index].code
+        lines = [f'<meta http-equiv="content-language" content="{code}" />']
+        for lang in LANGUAGES:
+            href = self.site_url + page_url(self.rel_path, lang.code)
+            lines.append(f'<link rel="alternate" hreflang="{lang.code}" href="{href}" />')
+        href = self.site_url + page_url(self.rel_path)
+        lines.append(f'<link rel="alternate" hreflang="x-default" href="{href}" />')
+        return '  ' + '\n    '.join(lines) + '\n  '
+
+
+def add_attribute(raw_tag, name):
+    """Add a boolean attribute to a start tag."""
+    end = len(raw_tag) - (2 if raw_tag.endswith('/>') else 1)
+    return f'{raw_tag[:end].rstrip()} {name}{raw_tag[end:]}'
+
+
+def split_page(content, rel_path, page_set, site_url):
+    """Return the single-language variants of a page, in LANGUAGES order."""
+    splitter = _LanguageSplitter(content, rel_path, page_set, site_url)
+    splitter.feed(content)
+    splitter.close()
+    edits = sorted(splitter.edits, key=lambda edit: (edit[0], edit[1]))
+
+    variants = []
+    for index in range(len(LANGUAGES)):
+        parts = []
+        pos = 0
+        for start, end, texts in edits:
+            if start < pos:
+                continue
+            parts.append(content[pos:start])
+            parts.append(texts[index])
+            pos = end
+        parts.append(content[pos:])
+        variants.append(''.join(parts))
+    return variants
+
+
+def process_page(page, page_set, site_url, output_dir):
+    """Write every language variant of one page; return (updated, messages)."""
+    try:
+        with open(page.path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except OSError as e:
+        return 0, [f"❌ Error reading {page.rel_path}: {e}"]
+
+    try:
+        variants = split_page(content, page.rel_path, page_set, site_url)
+    except Exception as e:
+        return 0, [f"❌ Error processing {page.rel_path}: {e}"]
+
+    updated = 0
+    messages = []
+    for lang, variant in zip(LANGUAGES, variants):
+        target = os.path.join(output_dir, lang.code, *page.rel_path.split('/'))
+        try:
+            try:
+                with open(target, 'r', encoding='utf-8') as f:
+                    if f.read() == variant:
+                        continue
+            except OSError:
+                pass
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            write_atomic(target, variant)
+            updated += 1
+            messages.append(f"✅ Updated: {lang.code}/{page.rel_path}")
+        except Exception as e:
+            messages.append(f"❌ Error writing {lang.code}/{page.rel_path}: {e}")
+    return updated, messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--config',
+        help='site config listing the pages to process (default: site_config.json)',
+    )
+    parser.add_argument(
+        '--output',
+        help='directory the language folders are written to (default: site root)',
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=1,
+        help='number of worker processes (0 = one per CPU core, default: 1)',
+    )
+    args = parser.parse_args()
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+
+    config = load_config(args.config)
+    output_dir = os.path.abspath(args.output or config['base_dir'])
+
+    # The template source page (contact.html) is a page of its own here
+    pages = discover_pages(config)
+    template_source = config['template_source']
+    rel_path = os.path.relpath(template_source, config['base_dir']).replace(os.sep, '/')
+    if os.path.exists(template_source) and rel_path not in {page.rel_path for page in pages}:
+        stat = os.stat(template_source)
+        pages.append(Page(template_source, rel_path, stat.st_mtime_ns, stat.st_size))
+        pages.sort(key=lambda page: page.rel_path)
+    page_set = frozenset(page.rel_path for page in pages)
+
+    print(f"Splitting {len(pages)} pages into {len(LANGUAGES)} languages\n")
+
+    args_iter = (pages, repeat(page_set), repeat(config['site_url']), repeat(output_dir))
+    if jobs > 1 and len(pages) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(process_page, *args_iter,
+                                        chunksize=max(1, len(pages) // (jobs * 4))))
+    else:
+        results = list(map(process_page, *args_iter))
+
+    updated_count = 0
+    for updated, messages in results:
+        updated_count += updated
+        for message in messages:
+            print(message)
+
+    total = len(pages) * len(LANGUAGES)
+    print(f"\n✅ Wrote {updated_count} of {total} page variants "
+          f"({total - updated_count} unchanged)")
+
+
+if __name__ == '__main__':
+    main()
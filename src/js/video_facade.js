@@ -0,0 +1,14 @@
+// Swap the video facades written by youtube_facades.py for the real player
+document.addEventListener('DOMContentLoaded', () => {
+  document.querySelectorAll('.video-facade').forEach((facade) => {
+    facade.addEventListener('click', () => {
+      const iframe = document.createElement('iframe')
+      iframe.src = facade.dataset.videoSrc
+      iframe.title = facade.title
+      iframe.allow = facade.dataset.allow
+      iframe.allowFullscreen = true
+      facade.replaceWith(iframe)
+      iframe.focus()
+    })
+  })
+})
@@ -0,0 +1,226 @@
+"""
+Shared registry of the page partials (header, footer, ...) used by
+replace_header_footer.py and replace_headers.py.
+
+Partials are extracted from a template source page (contact.html by
+default). The match patterns are compiled once at import, and the parsed
+partials are cached per source file and only re-read when its mtime or
+size changes.
+
+Fragments are the named partials pages include explicitly, one file per
+fragment in partials/ (partials/<name>.html), with {{ parameter }}
+placeholders filled in from the include:
+
+    <!-- partial: recipe-card {"href": "/recipe_details/x.html", ...} -->
+    ...rendered by replace_header_footer.py...
+    <!-- /partial: recipe-card -->
+
+Instead of inline JSON an include can name a key, whose parameters the
+tool owning the include resolves at build time, as render_listings.py
+does for the listing cards from listings.json and catalog.json:
+
+    <!-- partial: recipe-card recipe_details/x.html -->
+
+Rendering adds a digest of the fragment and its parameters to the start
+marker (#1a2b3c4d). An include whose digest still matches is left as it
+is, so what later stages add to the rendered markup (image dimensions,
+srcset) survives until the fragment or the parameters change.
+"""
+import hashlib
+import html
+import json
+import os
+import re
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Page the partials are taken from
+TEMPLATE_SOURCE = os.path.join(BASE_DIR, 'contact.html')
+
+# Patterns locating each partial in the template source
+PARTIAL_PATTERNS = {
+    'header': re.compile(r'<header\b[^>]*>.*?</header>', re.DOTALL),
+    'footer': re.compile(r'<footer\b[^>]*>.*?</footer>', re.DOTALL),
+}
+
+# Opening tag of an element replaced by replace_header_footer.py; the
+# closing tag is found with str.find
+ELEMENT_OPEN_PATTERN = re.compile(r'<(header|footer)\b[^>]*>')
+
+# Header together with its leading comment, as replaced by replace_headers.py
+HEADER_BLOCK_PATTERN = re.compile(r'(\s*)<!-- Header -->.*?</header>', re.DOTALL)
+
+# Indentation of the header block in the pages
+HEADER_BLOCK_INDENT = '        '
+
+# Directory of the fragment files
+FRAGMENT_DIR = os.path.join(BASE_DIR, 'partials')
+
+# A fragment include: the start marker with its JSON parameters or key and
+# the digest they were rendered with, the rendered fragment and the end marker
+FRAGMENT_INCLUDE_PATTERN = re.compile(
+    r'(?P<indent>[ \t]*)<!-- partial: (?P<name>[\w-]+)'
+    r'(?:\s+(?P<params>\{.*?\})|\s+(?P<key>[\w./-]+))?'
+    r'(?:\s+#(?P<digest>[0-9a-f]+))?\s*-->'
+    r'.*?<!-- /partial: (?P=name) -->',
+    re.DOTALL,
+)
+
+# Hex digits of the digest in a rendered include's start marker
+DIGEST_LENGTH = 8
+
+PLACEHOLDER_PATTERN = re.compile(r'\{\{\s*([\w-]+)\s*\}\}')
+
+# source path -> ((mtime_ns, size, partial names), partials, hash, hash per partial)
+_cache = {}
+
+# fragment path -> ((mtime_ns, size), markup, hash)
+_fragment_cache = {}
+
+
+def register_partial(name, pattern, flags=re.DOTALL):
+    """Register an extra partial to extract from the template source."""
+    PARTIAL_PATTERNS[name] = re.compile(pattern, flags)
+
+
+def _load(source):
+    """Return the cache entry for source, re-parsing it only if it changed."""
+    stat = os.stat(source)
+    key = (stat.st_mtime_ns, stat.st_size, tuple(PARTIAL_PATTERNS))
+    cached = _cache.get(source)
+    if cached and cached[0] == key:
+        return cached
+
+    with open(source, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    partials = {}
+    hashes = {}
+    digest = hashlib.sha256()
+    for name, pattern in PARTIAL_PATTERNS.items():
+        match = pattern.search(content)
+        if not match:
+            raise ValueError(f"No {name} partial found in {source}")
+        partials[name] = match.group(0)
+        hashes[name] = hashlib.sha256(partials[name].encode('utf-8')).hexdigest()
+        digest.update(name.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(partials[name].encode('utf-8'))
+        digest.update(b'\0')
+
+    cached = _cache[source] = (key, partials, digest.hexdigest(), hashes)
+    return cached
+
+
+def load_partials(source=TEMPLATE_SOURCE):
+    """Return {name: markup} for every registered partial."""
+    return _load(source)[1]
+
+
+def get_partial(name, source=TEMPLATE_SOURCE):
+    """Return the markup of a single partial."""
+    return load_partials(source)[name]
+
+
+def partials_hash(source=TEMPLATE_SOURCE):
+    """Hash of all partials; changes whenever any of them does."""
+    return _load(source)[2]
+
+
+def partial_hashes(source=TEMPLATE_SOURCE):
+    """Return {name: hash} for every registered partial."""
+    return _load(source)[3]
+
+
+def load_fragments(directory=FRAGMENT_DIR):
+    """Return {name: (markup, hash)} for the fragment files in directory.
+
+    Each file is only re-read when its mtime or size changes.
+    """
+    fragments = {}
+    try:
+        names = sorted(os.listdir(directory))
+    except OSError:
+        return fragments
+    for file_name in names:
+        name, ext = os.path.splitext(file_name)
+        if ext != '.html':
+            continue
+        path = os.path.join(directory, file_name)
+        stat = os.stat(path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = _fragment_cache.get(path)
+        if not cached or cached[0] != key:
+            with open(path, 'r', encoding='utf-8') as f:
+                markup = f.read().strip('\n')
+            cached = _fragment_cache[path] = (
+                key, markup, hashlib.sha256(markup.encode('utf-8')).hexdigest()
+            )
+        fragments[name] = cached[1:]
+    return fragments
+
+
+def render_fragment(markup, params, indent=''):
+    """Fill a fragment's placeholders with the HTML-escaped parameters."""
+
+    def replace(match):
+        name = match.group(1)
+        if name not in params:
+            raise KeyError(f"missing fragment parameter '{name}'")
+        return html.escape(str(params[name]))
+
+    rendered = PLACEHOLDER_PATTERN.sub(replace, markup)
+    return '\n'.join(f'{indent}{line}' if line.strip() else '' for line in rendered.split('\n'))
+
+
+def fragment_digest(fragment_hash, params):
+    """Digest of a fragment rendered with the given parameters."""
+    data = fragment_hash + json.dumps(params, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()[:DIGEST_LENGTH]
+
+
+def splice_fragments(content, fragments, keyed=None):
+    """Re-render the fragment includes of a document that are out of date.
+
+    Only includes whose fragment or parameters changed since they were
+    rendered (see fragment_digest) are rendered again. The parameters of
+    keyed includes are looked up in keyed ({(name, key): params}); keyed
+    includes not in it are left to the tool that owns them. Returns
+    (content, names of the fragments included, keyed or not). An include
+    of an unknown fragment, or with invalid parameters, raises ValueError.
+    """
+    included = set()
+    keyed = keyed or {}
+
+    def replace(match):
+        name = match.group('name')
+        key = match.group('key')
+        included.add(name)
+        if key and (name, key) not in keyed:
+            return match.group(0)
+        if name not in fragments:
+            raise ValueError(f"Unknown partial '{name}'")
+        markup, fragment_hash = fragments[name]
+        try:
+            if key:
+                params = keyed[(name, key)]
+            else:
+                params = json.loads(match.group('params')) if match.group('params') else {}
+            digest = fragment_digest(fragment_hash, params)
+            if match.group('digest') == digest:
+                return match.group(0)
+            body = render_fragment(markup, params, match.group('indent'))
+        except (ValueError, KeyError) as e:
+            raise ValueError(f"Bad include of partial '{name}': {e}") from e
+        indent = match.group('indent')
+        reference = key or match.group('params')
+        reference = f' {reference}' if reference else ''
+        start = f'{indent}<!-- partial: {name}{reference} #{digest} -->'
+        return f'{start}\n{body}\n{indent}<!-- /partial: {name} -->'
+
+    return FRAGMENT_INCLUDE_PATTERN.sub(replace, content), included
+
+
+def header_block(source=TEMPLATE_SOURCE):
+    """Return the header with its leading comment, indented as in the pages."""
+    return f"{HEADER_BLOCK_INDENT}<!-- Header -->\n{HEADER_BLOCK_INDENT}{get_partial('header', source)}"
@@ -0,0 +1,48 @@
+"""Inlining critical CSS is stable on minified pages."""
+import os
+import shutil
+import tempfile
+import unittest
+
+from critical_css import MAX_CRITICAL_BYTES, inline_critical_css
+from html_minify import minify_html
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STYLESHEETS = ('src/vendor/bootstrap/css/bootstrap.min.css', 'src/css/main.css')
+
+
+class CriticalCssOnMinifiedPagesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.site_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.site_dir)
+        for name in STYLESHEETS:
+            path = os.path.join(self.site_dir, *name.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            shutil.copy(os.path.join(REPO_DIR, *name.split('/')), path)
+        with open(os.path.join(REPO_DIR, 'index.html'), 'r', encoding='utf-8') as f:
+            self.page = minify_html(f.read())
+
+    def inline(self, content):
+        result = inline_critical_css(content, '', self.site_dir, {})
+        self.assertIsNotNone(result)
+        return result
+
+    def test_second_run_keeps_a_single_block(self):
+        first, size = self.inline(self.page)
+        self.assertLessEqual(size, MAX_CRITICAL_BYTES)
+        self.assertEqual(first.count('<style data-critical-css>'), 1)
+
+        second, _ = self.inline(first)
+        self.assertEqual(second.count('<style data-critical-css>'), 1)
+        self.assertEqual(second, first)
+
+    def test_second_run_after_minifying_again(self):
+        first, _ = self.inline(self.page)
+        second, _ = self.inline(minify_html(first))
+        self.assertEqual(second.count('<style data-critical-css>'), 1)
+        self.assertEqual(self.inline(second)[0], second)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+"""The header rendered from nav.json survives the later image stages."""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOGO = os.path.join('assets', 'images', 'logo_png_black@2x.png')
+
+
+class RenderNavAfterImageDimensionsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.site_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.site_dir)
+        for name in ('contact.html', 'nav.json', LOGO):
+            os.makedirs(os.path.join(self.site_dir, os.path.dirname(name)), exist_ok=True)
+            shutil.copy(os.path.join(REPO_DIR, name), os.path.join(self.site_dir, name))
+        self.config = os.path.join(self.site_dir, 'site_config.json')
+        with open(self.config, 'w', encoding='utf-8') as f:
+            json.dump({'template_source': 'contact.html', 'include': ['*.html']}, f)
+
+    def run_script(self, name, *args):
+        return subprocess.run(
+            [sys.executable, os.path.join(REPO_DIR, name), '--config', self.config, *args],
+            cwd=self.site_dir, capture_output=True, text=True,
+        )
+
+    def read_contact(self):
+        with open(os.path.join(self.site_dir, 'contact.html'), 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def test_check_passes_after_image_dimensions(self):
+        self.assertEqual(self.run_script('image_dimensions.py').returncode, 0)
+        content = self.read_contact()
+        self.assertIn('width="640"', content)
+
+        self.assertEqual(self.run_script('render_nav.py', '--check').returncode, 0)
+        self.assertEqual(self.run_script('render_nav.py').returncode, 0)
+        self.assertEqual(self.read_contact(), content)
+
+    def test_nav_change_is_still_rendered(self):
+        self.assertEqual(self.run_script('image_dimensions.py').returncode, 0)
+        nav_path = os.path.join(self.site_dir, 'nav.json')
+        with open(nav_path, 'r', encoding='utf-8') as f:
+            nav = json.load(f)
+        nav['brand']['alt'] = 'Kulinarium'
+        with open(nav_path, 'w', encoding='utf-8') as f:
+            json.dump(nav, f, ensure_ascii=False)
+
+        self.assertEqual(self.run_script('render_nav.py', '--check').returncode, 1)
+        self.assertEqual(self.run_script('render_nav.py').returncode, 0)
+        self.assertIn('alt="Kulinarium"', self.read_contact())
+
+
+if __name__ == '__main__':
+    unittest.main()
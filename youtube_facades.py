@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Replace the YouTube iframes of the recipe pages with click-to-play facades.
+
+Each <iframe> embedding a YouTube video in recipe_details/ becomes a
+<button class="video-facade"> showing the video's poster with a play
+button; src/js/video_facade.js swaps in the real player on click, so the
+player's scripts are only loaded for visitors who watch. The embed URL is
+normalised on the way (the pages have it HTML-escaped once, twice, or
+with stray quotes) and kept in data-video-src.
+
+Posters are read from the local cache in POSTER_DIR (<video id>.jpg) and
+the build never goes to the network; a video without a cached poster gets
+a plain black facade, and the missing ids are listed. --fetch downloads
+the missing posters into the cache first. Facades already written are
+regenerated, so rerunning after filling the cache adds their posters.
+"""
+import argparse
+import html
+import os
+import posixpath
+import re
+import urllib.request
+from urllib.parse import parse_qsl, urlencode
+
+from asset_fingerprints import strip_fingerprint
+from site_pages import discover_pages, load_config, match_path, write_atomic
+
+PAGE_PATTERN = 'recipe_details/*.html'
+
+POSTER_DIR = 'assets/images/video-posters'
+POSTER_URL = 'https://i.ytimg.com/vi/{}/hqdefault.jpg'
+POSTER_SIZE = (480, 360)
+
+EMBED_URL = 'https://www.youtube.com/embed/{}'
+
+# Parameters of the embed URL; autoplay starts the video on the click
+# that loaded it
+EMBED_PARAMS = {'wmode': 'opaque', 'enablejsapi': '1', 'autoplay': '1'}
+
+FACADE_SCRIPT = 'src/js/video_facade.js'
+
+# A YouTube iframe, or a facade written by an earlier run
+EMBED_PATTERN = re.compile(
+    r'(?P<indent>[ \t]*)(?:<iframe\b(?P<attrs>[^>]*?youtube[^>]*)>\s*</iframe>'
+    r'|<button\b(?P<facade>[^>]*\bclass="video-facade[^"]*"[^>]*)>.*?</button>)',
+    re.DOTALL,
+)
+VIDEO_ID_PATTERN = re.compile(r'youtube(?:-nocookie)?\.com/embed/([\w-]{11})')
+ATTRIBUTE_PATTERN = re.compile(r'([\w-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+
+SCRIPT_TAG_PATTERN = re.compile(r'([ \t]*)<script\b[^>]*\bsrc="[^"]*"[^>]*></script>\n')
+SCRIPT_SRC_PATTERN = re.compile(r'<script\b[^>]*\bsrc="([^"]*)"')
+
+
+def attributes(markup):
+    return {
+        match.group(1).lower(): match.group(2) if match.group(2) is not None else match.group(3)
+        for match in ATTRIBUTE_PATTERN.finditer(markup)
+    }
+
+
+def normalize_embed_url(url):
+    """Return (video id, canonical embed URL) of a YouTube embed URL, or None."""
+    # Undo any number of rounds of escaping
+    while True:
+        unescaped = html.unescape(url)
+        if unescaped == url:
+            break
+        url = unescaped
+    match = VIDEO_ID_PATTERN.search(url)
+    if not match:
+        return None
+    video_id = match.group(1)
+    query = url.partition('?')[2].rstrip('\\"\' ')
+    params = dict(EMBED_PARAMS)
+    for name, value in parse_qsl(query):
+        name, value = name.strip('\\"\' '), value.strip('\\"\' ')
+        if name and name not in EMBED_PARAMS:
+            params[name] = value
+    return video_id, f'{EMBED_URL.format(video_id)}?{urlencode(params)}'
+
+
+def render_facade(indent, video_id, src, title, allow, poster):
+    """Markup of a facade; poster is the image URL relative to the page, or None."""
+    escape = html.escape
+    lines = [
+        f'{indent}<button',
+        f'{indent}  type="button"',
+        f'{indent}  class="video-facade"',
+        f'{indent}  title="{escape(title)}"',
+        f'{indent}  aria-label="{escape(title)}"',
+        f'{indent}  data-video-id="{video_id}"',
+        f'{indent}  data-video-src="{escape(src)}"',
+        f'{indent}  data-allow="{escape(allow)}"',
+        f'{indent}>',
+    ]
+    if poster:
+        width, height = POSTER_SIZE
+        lines.append(
+            f'{indent}  <img src="{escape(poster)}" alt="" loading="lazy" '
+            f'width="{width}" height="{height}" />'
+        )
+    lines.append(f'{indent}  <span class="video-facade--play" aria-hidden="true"></span>')
+    lines.append(f'{indent}</button>')
+    return '\n'.join(lines)
+
+
+def replace_embeds(content, page_dir, base_dir, missing):
+    """Return the page with its embeds as facades, and the number of embeds.
+
+    Video ids without a cached poster are added to missing.
+    """
+    count = 0
+
+    def replace(match):
+        nonlocal count
+        if match.group('facade') is not None:
+            attrs = attributes(match.group('facade'))
+            src = attrs.get('data-video-src', '')
+            allow = attrs.get('data-allow', '')
+        else:
+            attrs = attributes(match.group('attrs'))
+            src = attrs.get('src', '')
+            allow = attrs.get('allow', '')
+        normalized = normalize_embed_url(src)
+        if not normalized:
+            return match.group(0)
+        count += 1
+        video_id, url = normalized
+        poster_path = f'{POSTER_DIR}/{video_id}.jpg'
+        poster = None
+        if os.path.exists(os.path.join(base_dir, *poster_path.split('/'))):
+            poster = posixpath.relpath(poster_path, page_dir or '.')
+        else:
+            missing.add(video_id)
+        return render_facade(
+            match.group('indent'), video_id, url,
+            html.unescape(attrs.get('title') or 'Video'), html.unescape(allow), poster,
+        )
+
+    content = EMBED_PATTERN.sub(replace, content)
+    return content, count
+
+
+def add_script(content, page_dir):
+    """Load the facade script after the page's last script, once.
+
+    A reference fingerprinted by replace_header_footer.py --fingerprint
+    counts as the script already being there.
+    """
+    src = posixpath.relpath(FACADE_SCRIPT, page_dir or '.')
+    if any(strip_fingerprint(match.group(1)) == src
+           for match in SCRIPT_SRC_PATTERN.finditer(content)):
+        return content
+    matches = list(SCRIPT_TAG_PATTERN.finditer(content))
+    if not matches:
+        return content.replace('</body>', f'<script src="{src}"></script>\n</body>', 1)
+    last = matches[-1]
+    return (content[:last.end()] + f'{last.group(1)}<script src="{src}"></script>\n'
+            + content[last.end():])
+
+
+def fetch_posters(base_dir, video_ids):
+    poster_dir = os.path.join(base_dir, *POSTER_DIR.split('/'))
+    os.makedirs(poster_dir, exist_ok=True)
+    for video_id in sorted(video_ids):
+        try:
+            with urllib.request.urlopen(POSTER_URL.format(video_id), timeout=30) as response:
+                data = response.read()
+        except OSError as e:
+            print(f"❌ Could not fetch the poster of {video_id}: {e}")
+            continue
+        write_atomic(os.path.join(poster_dir, f'{video_id}.jpg'), data)
+        print(f"⬇️  Fetched poster {video_id}.jpg")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        '--config',
+        help='site config listing the pages to process (default: site_config.json)',
+    )
+    parser.add_argument(
+        '--fetch',
+        action='store_true',
+        help=f'download missing posters into {POSTER_DIR} first (needs network access)',
+    )
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    base_dir = config['base_dir']
+    pages = [page for page in discover_pages(config) if match_path(page.rel_path, PAGE_PATTERN)]
+
+    if args.fetch:
+        missing = set()
+        for page in pages:
+            with open(page.path, 'r', encoding='utf-8') as f:
+                replace_embeds(f.read(), posixpath.dirname(page.rel_path), base_dir, missing)
+        fetch_posters(base_dir, missing)
+
+    missing = set()
+    updated_count = 0
+    video_count = 0
+    for page in pages:
+        try:
+            with open(page.path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            page_dir = posixpath.dirname(page.rel_path)
+            new_content, count = replace_embeds(content, page_dir, base_dir, missing)
+            if not count:
+                continue
+            video_count += count
+            new_content = add_script(new_content, page_dir)
+            if new_content != content:
+                write_atomic(page.path, new_content)
+                updated_count += 1
+                print(f"✅ Updated: {page.rel_path}")
+        except Exception as e:
+            print(f"❌ Error processing {page.rel_path}: {e}")
+
+    if missing:
+        print(f"\n⚠️  No cached poster for {len(missing)} videos (run with --fetch, or save "
+              f"{POSTER_URL.format('<id>')} as {POSTER_DIR}/<id>.jpg):")
+        for video_id in sorted(missing):
+            print(f"  {video_id}")
+
+    print(f"\n✅ {video_count} videos, {updated_count} of {len(pages)} pages updated")
+
+
+if __name__ == '__main__':
+    main()